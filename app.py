@@ -1,12 +1,28 @@
 import streamlit as st
-import pandas as pd
-from fpdf import FPDF
-from io import BytesIO
 import base64
 from datetime import date
+import time
+import compliance
+import exports
+import daily_cube
+import dedup
+import district_packs
+import history_store
+import ingest
+import pipeline
+import profiling
+import table_view
+from debug_log import debug_enabled, log_debug, log_event, logger
 
 st.set_page_config(layout="wide", page_title="Footfall Summary Report")
 
+# Opt-in per-stage profiling (?profile=1). A rerun that Streamlit interrupted never reached
+# finish_run, so the session's last run is released before a new one starts.
+profiling.release(st.session_state.pop('profile_run', None))
+profile_run = None
+if profiling.requested(st.query_params):
+    profile_run = st.session_state.profile_run = profiling.start_run()
+
 # Custom CSS for compact, beautiful design with bold headers
 st.markdown("""
 <style>
@@ -87,14 +103,12 @@ st.markdown("""
         border-bottom: 2px solid #1e90ff;
         padding-bottom: 5px;
     }
-    .summary-container {
+    [class*="st-key-summary-container"] {
         background-color: #ffffff;
         border-radius: 10px;
         padding: 15px;
         box-shadow: 0 4px 12px rgba(0,0,0,0.1);
         border: 1px solid #e0e0e0;
-        max-height: 300px;
-        overflow-y: auto;
     }
     .stButton>button {
         background-color: #1e90ff;
@@ -124,80 +138,53 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def clean_columns(df):
-    df.columns = [col.strip() for col in df.columns]
-    return df
-
-def to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.fillna(0).to_excel(writer, index=False, sheet_name='Sheet1')
-    return output.getvalue()
-
-def create_pdf(df, title):
-    pdf = FPDF(orientation="L", unit="mm", format="A4")
-    pdf.add_page()
-    pdf.set_font("Arial", size=8)
-    pdf.set_fill_color(220, 220, 220)
-    pdf.cell(0, 10, title, ln=1, align='C')
-
-    col_widths = []
-    for col in df.columns:
-        if col == 'Facility_Name':
-            col_widths.append(60)
-        elif col == 'District_Name':
-            col_widths.append(35)
-        elif col == 'AAM_Type':
-            col_widths.append(25)
-        else:
-            col_widths.append(30)
-
-    for i, col in enumerate(df.columns):
-        wrapped_header = col.replace(' ', '\n')
-        x, y = pdf.get_x(), pdf.get_y()
-        pdf.multi_cell(col_widths[i], 5, wrapped_header, border=1, align='C')
-        pdf.set_xy(x + col_widths[i], y)
-    pdf.ln()
-
-    for _, row in df.fillna(0).iterrows():
-        for i, val in enumerate(row):
-            pdf.cell(col_widths[i], 10, str(val), border=1)
-        pdf.ln()
-
-    return pdf.output(dest='S').encode('latin1')
-
-def to_combined_excel(facility_df, district_df, total_registered, total_reported):
-    # Debug: Log dictionaries before creating combined_summary
-    with open("debug.log", "a") as f:
-        f.write("--- Combined Excel Dictionaries ---\n")
-        f.write(f"total_registered: {total_registered}\n")
-        f.write(f"total_reported: {total_reported}\n")
-
-    output = BytesIO()
-    combined_summary = pd.DataFrame({
-        'Metric': ['Total Facilities (AAM-UPHC)', 'Total Facilities (AAM-USHC)', 'Reported Facilities (AAM-UPHC)', 'Reported Facilities (AAM-USHC)'],
-        'Value': [
-            total_registered.get('AAM-UPHC', 0),
-            total_registered.get('AAM-USHC', 0),
-            total_reported.get('AAM-UPHC', 0),
-            total_reported.get('AAM-USHC', 0)
-        ]
-    })
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        facility_df.fillna(0).to_excel(writer, index=False, sheet_name='Facility-wise Summary')
-        district_df.fillna(0).to_excel(writer, index=False, sheet_name='District-wise Summary')
-        combined_summary.to_excel(writer, index=False, sheet_name='Dashboard Summary')
-        workbook = writer.book
-        for sheet_name, df in {
-            'Facility-wise Summary': facility_df.fillna(0),
-            'District-wise Summary': district_df.fillna(0),
-            'Dashboard Summary': combined_summary
-        }.items():
-            worksheet = writer.sheets[sheet_name]
-            for i, width in enumerate(df.columns.astype(str)):
-                col_width = max(df[width].astype(str).map(len).max(), len(width)) + 2
-                worksheet.set_column(i, i, col_width)
-    return output.getvalue()
+@st.fragment
+def export_control(label, file_name, key, builder, *args):
+    job = exports.get_export(key)
+    if job is None:
+        if not st.button(label.replace("Download", "Prepare", 1), key=f"prepare-{file_name}"):
+            return
+        if profiling.requested(st.query_params):
+            builder = profiling.timed(builder, file_name)
+        job = exports.request_export(key, builder, *args)
+
+    future = job['future']
+    if not future.done():
+        st.progress(job['progress'], text=f"Building {file_name}...")
+        time.sleep(0.3)
+        st.rerun(scope="fragment")
+
+    try:
+        data = future.result()
+    except Exception as e:
+        exports.discard(key)
+        st.error(f"❌ Error building {file_name}: {e}")
+        return
+    if isinstance(data, exports.SpooledFile):
+        with data.open() as f:
+            st.download_button(label, f, file_name=file_name, key=f"download-{file_name}")
+        return
+    st.download_button(label, data, file_name=file_name, key=f"download-{file_name}")
+
+def paged_table(view, key):
+    # Only the current page is sent to the browser; search, sort and paging run on the server
+    col_search, col_sort, col_order, col_size = st.columns([3, 2, 1, 1])
+    query = col_search.text_input("Search district or facility", key=f"{key}-search")
+    sort_by = col_sort.selectbox("Sort by", options=[None] + view.columns, format_func=lambda col: col or "Original order", key=f"{key}-sort")
+    descending = col_order.toggle("Descending", key=f"{key}-descending")
+    page_size = col_size.selectbox("Rows", options=table_view.PAGE_SIZES, key=f"{key}-rows")
+
+    positions = view.select(query, sort_by, descending)
+    pages = table_view.page_count(len(positions), page_size)
+    # A narrower search can leave the remembered page past the end
+    if st.session_state.get(f"{key}-page", 1) > pages:
+        st.session_state[f"{key}-page"] = pages
+    page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}-page")
+    with profiling.stage(f"table {key}"):
+        st.dataframe(view.page(positions, page, page_size), hide_index=True)
+    first = (page - 1) * page_size
+    st.caption(f"Rows {min(first + 1, len(positions))}–{min(first + page_size, len(positions))} of {len(positions)}"
+               + (f" (filtered from {len(view)})" if len(positions) != len(view) else ""))
 
 # Initialize session state for date inputs
 if 'start_date' not in st.session_state:
@@ -208,138 +195,73 @@ if 'end_date' not in st.session_state:
 # File uploaders and filters in a single row
 col_upload1, col_upload2, col_filters = st.columns([1, 1, 1])
 with col_upload1:
-    footfall_file = st.file_uploader("Upload Daily_Entry (Footfall Report)", type=["xlsx", "xls", "csv"])
+    footfall_files = st.file_uploader("Upload Daily_Entry (Footfall Report)", type=["xlsx", "xls", "csv"], accept_multiple_files=True)
 with col_upload2:
     master_file = st.file_uploader("Upload FPE_Entry (Facility Master)", type=["xlsx", "xls", "csv"])
 with col_filters:
     aam_type_filter = st.selectbox("Select AAM Type", options=["AAM-USHC", "AAM-UPHC"])
+    history = history_store.get_history()
+    history_has_footfall = history.has_footfall()
+    use_history = st.toggle(
+        "Keep footfall history",
+        value=history_has_footfall,
+        help="Merge uploads into the saved history, so later sessions only need the new days"
+    )
+    duplicate_policy = st.selectbox(
+        "Duplicate entries",
+        options=list(dedup.POLICIES),
+        format_func=dedup.POLICIES.get,
+        help="Re-submitted daily entries are always reported below; other policies also drop them from the totals"
+    )
     col_date1, col_date2 = st.columns(2)
 
-if footfall_file and master_file:
-    try:
-        if footfall_file.name.endswith(".csv"):
-            footfall_df = pd.read_csv(footfall_file)
-        else:
-            footfall_df = pd.read_excel(footfall_file)
+# With the saved history on, either upload can be skipped once the history holds its data
+has_inputs = bool(footfall_files and master_file) or (
+    use_history and (footfall_files or history_has_footfall) and (master_file or history.has_master())
+)
 
-        if master_file.name.endswith(".csv"):
-            master_df = pd.read_csv(master_file)
-        else:
-            master_df = pd.read_excel(master_file)
-
-        footfall_df = clean_columns(footfall_df)
-        master_df = clean_columns(master_df)
-
-        # Enhanced column renaming for robustness
-        footfall_column_map = {
-            'Facility Name': 'Facility_Name',
-            'Facility_Name': 'Facility_Name',
-            'facility name': 'Facility_Name',
-            'facility_name': 'Facility_Name',
-            'AAM Type': 'AAM_Type',
-            'AAM_Type': 'AAM_Type',
-            'aam type': 'AAM_Type',
-            'aam_type': 'AAM_Type',
-            'UPHC': 'AAM_Type',
-            'USHC': 'AAM_Type',
-            'AAM_USHC': 'AAM_Type',
-            'AAM_UPHC': 'AAM_Type',
-            'District': 'District_Name',
-            'District_Name': 'District_Name',
-            'district': 'District_Name',
-            'district_name': 'District_Name',
-            'Entry Date': 'Entry_Date',
-            'Entry_Date': 'Entry_Date',
-            'entry date': 'Entry_Date',
-            'entry_date': 'Entry_Date',
-            'Footfall Female': 'Footfall_Female',
-            'Footfall Female ': 'Footfall_Female',
-            'footfall female': 'Footfall_Female',
-            'Footfall Total': 'Footfall_Total',
-            'Footfall_Total': 'Footfall_Total',
-            'footfall total': 'Footfall_Total'
-        }
-
-        master_column_map = {
-            'HFI_Name': 'Facility_Name',
-            'HFI Name': 'Facility_Name',
-            'Facility_Name': 'Facility_Name',
-            'facility name': 'Facility_Name',
-            'facility_name': 'Facility_Name',
-            'FACILITY_TYPE': 'AAM_Type',
-            'Facility Type': 'AAM_Type',
-            'facility type': 'AAM_Type',
-            'AAM Type': 'AAM_Type',
-            'AAM_Type': 'AAM_Type',
-            'aam type': 'AAM_Type',
-            'aam_type': 'AAM_Type',
-            'UPHC': 'AAM_Type',
-            'USHC': 'AAM_Type',
-            'AAM_USHC': 'AAM_Type',
-            'AAM_UPHC': 'AAM_Type',
-            'District_Name': 'District_Name',
-            'District': 'District_Name',
-            'district': 'District_Name',
-            'district_name': 'District_Name'
-        }
-
-        footfall_df.rename(columns={k: v for k, v in footfall_column_map.items() if k in footfall_df.columns}, inplace=True)
-        master_df.rename(columns={k: v for k, v in master_column_map.items() if k in master_df.columns}, inplace=True)
-
-        # Check for required columns
-        required_footfall_cols = ['Facility_Name', 'AAM_Type', 'District_Name', 'Entry_Date', 'Footfall_Total', 'Footfall_Female']
-        required_master_cols = ['Facility_Name', 'AAM_Type', 'District_Name']
-        missing_footfall_cols = [col for col in required_footfall_cols if col not in footfall_df.columns]
-        missing_master_cols = [col for col in required_master_cols if col not in master_df.columns]
+if has_inputs:
+    try:
+        missing_footfall_cols = missing_master_cols = []
+        with profiling.stage("load uploads"):
+            if footfall_files:
+                # Several exports (e.g. one per month) are parsed concurrently and merged, overlapping days once
+                footfall_df, missing_footfall_cols, footfall_key = ingest.load_footfall_uploads([(f.name, f.getvalue()) for f in footfall_files])
+            if master_file:
+                master_df, missing_master_cols, master_key = ingest.load_normalized(master_file.name, master_file.getvalue(), 'master')
 
         if missing_footfall_cols or missing_master_cols:
             st.error(f"Missing columns in Footfall DataFrame: {missing_footfall_cols}, Master DataFrame: {missing_master_cols}")
             st.stop()
 
-        # Debug: Log raw data before standardization
-        with open("debug.log", "a") as f:
-            f.write("--- Raw Data Before Standardization ---\n")
-            f.write(f"Master DataFrame AAM_Type values: {master_df['AAM_Type'].unique().tolist()}\n")
-            f.write(f"Master DataFrame Facility_Name count (all entries): {len(master_df['Facility_Name'])}\n")
-            f.write(f"Master DataFrame Facility_Name unique count: {master_df['Facility_Name'].nunique()}\n")
-            f.write(f"Footfall DataFrame AAM_Type values: {footfall_df['AAM_Type'].unique().tolist()}\n")
-            f.write(f"Footfall DataFrame Facility_Name count (all entries): {len(footfall_df['Facility_Name'])}\n")
-            f.write(f"Footfall DataFrame Facility_Name unique count: {footfall_df['Facility_Name'].nunique()}\n")
-
-        # Standardize AAM_Type values to AAM-UPHC or AAM-USHC
-        def standardize_aam_type(value):
-            if isinstance(value, str):
-                value = value.strip().upper()
-                if 'UPHC' in value:
-                    return 'AAM-UPHC'
-                if 'USHC' in value:
-                    return 'AAM-USHC'
-            return value
-
-        footfall_df['AAM_Type'] = footfall_df['AAM_Type'].apply(standardize_aam_type)
-        master_df['AAM_Type'] = master_df['AAM_Type'].apply(standardize_aam_type)
-        footfall_df['Facility_Name'] = footfall_df['Facility_Name'].str.strip().str.upper()
-        master_df['Facility_Name'] = master_df['Facility_Name'].str.strip().str.upper()
-
-        footfall_df['Entry_Date'] = pd.to_datetime(footfall_df['Entry_Date'], errors='coerce')
-
-        # Debug: Log data after standardization
-        with open("debug.log", "a") as f:
-            f.write("--- Data After Standardization ---\n")
-            f.write(f"Master DataFrame AAM_Type values: {master_df['AAM_Type'].unique().tolist()}\n")
-            f.write(f"Master DataFrame Facility_Name count (all entries): {len(master_df['Facility_Name'])}\n")
-            f.write(f"Master DataFrame Facility_Name unique count: {master_df['Facility_Name'].nunique()}\n")
-            f.write(f"Footfall DataFrame AAM_Type values: {footfall_df['AAM_Type'].unique().tolist()}\n")
-            f.write(f"Footfall DataFrame Facility_Name count (all entries): {len(footfall_df['Facility_Name'])}\n")
-            f.write(f"Footfall DataFrame Facility_Name unique count: {footfall_df['Facility_Name'].nunique()}\n")
-            f.write(f"Sample master_df facilities: {master_df['Facility_Name'].head().tolist()}\n")
-            f.write(f"Sample footfall_df facilities: {footfall_df['Facility_Name'].head().tolist()}\n")
+        duplicates = None
+        if footfall_files:
+            # Duplicate submissions are flagged, or collapsed per the chosen policy, before any totals
+            with profiling.stage("duplicates"):
+                footfall_df, duplicates = dedup.get_deduplicated(footfall_key, footfall_df, duplicate_policy)
+            footfall_key = dedup.policy_key(footfall_key, duplicate_policy)
+
+        if use_history:
+            # Uploads are merged once (keyed by content hash); totals come from indexed range queries
+            with profiling.stage("history"):
+                if footfall_files:
+                    history.append_footfall(footfall_key, footfall_df)
+                if master_file:
+                    history.replace_master(master_key, master_df)
+                master_df = history.master()
+            source = history
+            input_key = f"history-{history.revision()}"
+        else:
+            # Facility x day prefix-sum cube, built once per footfall upload
+            with profiling.stage("daily cube"):
+                source = daily_cube.get_cube(footfall_key, footfall_df)
+            input_key = f"{footfall_key}|{master_key}"
 
         # Set default dates for the entire dataset
-        unique_dates = footfall_df['Entry_Date'].dropna().dt.date.unique()
-        if len(unique_dates) > 0:
-            default_start_date = min(unique_dates)
-            default_end_date = max(unique_dates)
+        first_day, last_day = source.day_bounds()
+        if first_day is not None:
+            default_start_date = first_day.date()
+            default_end_date = last_day.date()
         else:
             default_start_date = date.today()
             default_end_date = date.today()
@@ -356,43 +278,35 @@ if footfall_file and master_file:
                 "From Date",
                 value=st.session_state.start_date,
                 format="YYYY-MM-DD",
-                disabled=not (footfall_file and master_file)
+                disabled=not has_inputs
             )
         with col_date2:
             st.session_state.end_date = st.date_input(
                 "To Date",
                 value=st.session_state.end_date,
                 format="YYYY-MM-DD",
-                disabled=not (footfall_file and master_file)
+                disabled=not has_inputs
             )
 
         # Debug: Log date rendering
-        with open("debug.log", "a") as f:
-            f.write(f"Selected Date Range: From {st.session_state.start_date} to {st.session_state.end_date}\n")
-            f.write("Date Inputs Rendered: From Date and To Date\n")
-
-        # Filter footfall_df by date range
-        footfall_df_filtered = footfall_df
-        if st.session_state.start_date and st.session_state.end_date and st.session_state.start_date <= st.session_state.end_date:
-            footfall_df_filtered = footfall_df[
-                (footfall_df['Entry_Date'].dt.date >= st.session_state.start_date) &
-                (footfall_df['Entry_Date'].dt.date <= st.session_state.end_date)
-            ]
+        log_debug("date_range_selected", start_date=st.session_state.start_date, end_date=st.session_state.end_date)
+
+        # Per-facility totals for the date range, from the cube's prefix sums or the saved history
+        with profiling.stage("date filter"):
+            footfall_df_filtered = pipeline.range_totals(source, st.session_state.start_date, st.session_state.end_date)
 
         # Debug: Log filtered data
-        with open("debug.log", "a") as f:
-            f.write(f"Footfall DataFrame after date filtering (rows): {len(footfall_df_filtered)}\n")
-            f.write(f"Footfall DataFrame AAM_Type values after filtering: {footfall_df_filtered['AAM_Type'].unique().tolist()}\n")
-            f.write(f"Footfall DataFrame Facility_Name count (all entries) after filtering: {len(footfall_df_filtered['Facility_Name'])}\n")
+        if debug_enabled():
+            log_debug(
+                "footfall_date_filtered",
+                facility_rows=len(footfall_df_filtered),
+                entries=int(footfall_df_filtered['Entry_Count'].sum()),
+                aam_types=footfall_df_filtered['AAM_Type'].unique().tolist()
+            )
 
         # Calculate metrics for dashboard (count all Facility_Name entries, including duplicates)
-        total_registered = master_df.groupby('AAM_Type')['Facility_Name'].count().to_dict()
-        total_reported = footfall_df_filtered.groupby('AAM_Type')['Facility_Name'].count().to_dict()
-
-        # Debug: Log total_reported before AAM_Type filtering
-        with open("debug.log", "a") as f:
-            f.write("--- Total Reported Before AAM_Type Filtering ---\n")
-            f.write(f"total_reported: {total_reported}\n")
+        with profiling.stage("dashboard totals"):
+            total_registered, total_reported = pipeline.dashboard_totals(master_df, footfall_df_filtered)
 
         total_uphc = total_registered.get('AAM-UPHC', 0)
         total_ushc = total_registered.get('AAM-USHC', 0)
@@ -400,16 +314,21 @@ if footfall_file and master_file:
         reported_ushc = total_reported.get('AAM-USHC', 0)
 
         # Debug: Log calculated metrics
-        with open("debug.log", "a") as f:
-            f.write("--- Calculated Metrics ---\n")
-            f.write(f"Total UPHC Facilities (all entries): {total_uphc}\n")
-            f.write(f"Total USHC Facilities (all entries): {total_ushc}\n")
-            f.write(f"Reported UPHC Facilities (all entries, date-filtered): {reported_uphc}\n")
-            f.write(f"Reported USHC Facilities (all entries, date-filtered): {reported_ushc}\n")
-            f.write(f"Total entries in master_df: {len(master_df)}\n")
-            f.write(f"Total unique facilities in master_df: {master_df['Facility_Name'].nunique()}\n")
-            f.write(f"Total entries in footfall_df (filtered): {len(footfall_df_filtered)}\n")
-            f.write(f"Total unique facilities in footfall_df (filtered): {footfall_df_filtered['Facility_Name'].nunique()}\n")
+        log_event(
+            "dashboard_metrics",
+            total_uphc=total_uphc,
+            total_ushc=total_ushc,
+            reported_uphc=reported_uphc,
+            reported_ushc=reported_ushc
+        )
+        if debug_enabled():
+            log_debug(
+                "dashboard_inputs",
+                master_entries=len(master_df),
+                master_unique_facilities=master_df['Facility_Name'].nunique(),
+                footfall_facility_rows=len(footfall_df_filtered),
+                footfall_unique_facilities=footfall_df_filtered['Facility_Name'].nunique()
+            )
 
         # Dashboard display
         st.markdown('<div class="header"><h1 class="title">Footfall Summary Report</h1></div>', unsafe_allow_html=True)
@@ -447,98 +366,125 @@ if footfall_file and master_file:
                 """, unsafe_allow_html=True)
             st.markdown('</div>', unsafe_allow_html=True)
 
-        # Filter by AAM Type for summaries
-        footfall_df_filtered = footfall_df_filtered[footfall_df_filtered['AAM_Type'] == aam_type_filter.upper()]
-        master_df_filtered = master_df[master_df['AAM_Type'] == aam_type_filter.upper()]
-
-        # Debug: Log total_reported after AAM_Type filtering
-        with open("debug.log", "a") as f:
-            f.write("--- Total Reported After AAM_Type Filtering ---\n")
-            f.write(f"Filtered Footfall DataFrame AAM_Type values: {footfall_df_filtered['AAM_Type'].unique().tolist()}\n")
-            f.write(f"Filtered Footfall DataFrame Facility_Name count (all entries): {len(footfall_df_filtered['Facility_Name'])}\n")
-
-        footfall_df_filtered.fillna(0, inplace=True)
-        master_df_filtered.fillna(0, inplace=True)
-
-        # Facility-wise Summary (date-filtered, includes all Facility_Name entries)
-        facility_summary = footfall_df_filtered.groupby(['District_Name', 'Facility_Name', 'AAM_Type'], as_index=False)[['Footfall_Total', 'Footfall_Female']].sum()
-        facility_summary['% Female Footfall'] = round((facility_summary['Footfall_Female'] / facility_summary['Footfall_Total'].replace(0, 1)) * 100, 2)
-        facility_summary.insert(0, 'S.No.', range(1, len(facility_summary) + 1))
-
-        total_footfall = facility_summary['Footfall_Total'].sum()
-        total_female = facility_summary['Footfall_Female'].sum()
-        total_percent_female = round((total_female / total_footfall) * 100, 2) if total_footfall != 0 else 0
-        total_row = {
-            'S.No.': '',
-            'District_Name': 'Total',
-            'Facility_Name': '',
-            'AAM_Type': '',
-            'Footfall_Total': total_footfall,
-            'Footfall_Female': total_female,
-            '% Female Footfall': total_percent_female
-        }
-        facility_summary = pd.concat([facility_summary, pd.DataFrame([total_row])], ignore_index=True)
-
-        # District-wise Summary (date-filtered, count all Facility_Name entries)
-        total_registered_summary = master_df_filtered.groupby('District_Name')['Facility_Name'].count().reset_index(name='Registered_Facilities')
-        total_reported_summary = footfall_df_filtered.groupby('District_Name')['Facility_Name'].count().reset_index(name='Reported_Facilities')
-        total_footfall = footfall_df_filtered.groupby('District_Name')['Footfall_Total'].sum().reset_index(name='Total_Footfall')
-
-        district_summary = total_registered_summary.merge(total_reported_summary, on='District_Name', how='left') \
-                                                  .merge(total_footfall, on='District_Name', how='left')
-
-        district_summary['Reported_Facilities'].fillna(0, inplace=True)
-        district_summary['Reported_Facilities'] = district_summary['Reported_Facilities'].astype(int)
-        district_summary['Unreported_Facilities'] = district_summary['Registered_Facilities'] - district_summary['Reported_Facilities']
-        district_summary['Avg_Footfall_Per_Facility'] = round(district_summary['Total_Footfall'] / district_summary['Reported_Facilities'].replace(0, 1), 2)
-        district_summary['%_Reported'] = round((district_summary['Reported_Facilities'] / district_summary['Registered_Facilities']) * 100, 2)
-        district_summary.insert(0, 'S.No.', range(1, len(district_summary) + 1))
-
-        district_summary = district_summary[
-            ['S.No.', 'District_Name', 'Registered_Facilities', 'Reported_Facilities', 'Unreported_Facilities',
-             'Total_Footfall', 'Avg_Footfall_Per_Facility', '%_Reported']
-        ]
-
-        sum_row = {
-            'S.No.': '',
-            'District_Name': 'Total',
-            'Registered_Facilities': district_summary['Registered_Facilities'].sum(),
-            'Reported_Facilities': district_summary['Reported_Facilities'].sum(),
-            'Unreported_Facilities': district_summary['Unreported_Facilities'].sum(),
-            'Total_Footfall': district_summary['Total_Footfall'].sum(),
-            'Avg_Footfall_Per_Facility': round(district_summary['Total_Footfall'].sum() / district_summary['Reported_Facilities'].sum(), 2) if district_summary['Reported_Facilities'].sum() != 0 else 0,
-            '%_Reported': round((district_summary['Reported_Facilities'].sum() / district_summary['Registered_Facilities'].sum()) * 100, 2) if district_summary['Registered_Facilities'].sum() != 0 else 0
-        }
-        district_summary = pd.concat([district_summary, pd.DataFrame([sum_row])], ignore_index=True)
-
-        # Debug: Log summary data
-        with open("debug.log", "a") as f:
-            f.write("--- Summary Data ---\n")
-            f.write(f"Facility-wise Summary rows: {len(facility_summary)}\n")
-            f.write(f"Facility-wise Summary Facility_Name count (all entries): {len(facility_summary) - 1}\n")  # Exclude total row
-            f.write(f"Facility-wise Summary Facility_Name unique count: {facility_summary['Facility_Name'].nunique()}\n")
-            f.write(f"District-wise Summary rows: {len(district_summary)}\n")
-            f.write(f"District-wise Summary Reported_Facilities sum: {district_summary['Reported_Facilities'].sum()}\n")
+        # Summaries of both AAM types come from one pass and are memoized per inputs and date range
+        summary_key = (input_key, str(st.session_state.start_date), str(st.session_state.end_date))
+        with profiling.stage("summaries"):
+            facility_summary, district_summary = pipeline.get_summaries(summary_key, footfall_df_filtered, master_df)[aam_type_filter]
+
+        # Log summary data
+        log_event(
+            "summaries_built",
+            aam_type=aam_type_filter,
+            facility_rows=len(facility_summary) - 1,  # Exclude total row
+            district_rows=len(district_summary) - 1
+        )
+
+        # Exports are built on demand in the background and memoized per inputs, date range and AAM type
+        def export_key(fmt):
+            return exports.export_key(input_key, st.session_state.start_date, st.session_state.end_date, aam_type_filter, fmt)
 
         # Summaries and download buttons
         col_summary1, col_summary2 = st.columns(2)
         with col_summary1:
             st.markdown('<div class="subheader">📋 Facility-wise Summary</div>', unsafe_allow_html=True)
-            st.markdown('<div class="summary-container">', unsafe_allow_html=True)
-            st.dataframe(facility_summary.fillna(0))
-            st.markdown('</div>', unsafe_allow_html=True)
-            st.download_button("📥 Download Facility-wise Excel", to_excel(facility_summary), file_name="FacilityWiseReport.xlsx")
-            st.download_button("🧾 Download Facility-wise PDF", create_pdf(facility_summary, "Facility-wise Summary Report"), file_name="FacilityWiseReport.pdf")
+            with st.container(key="summary-container-facility"):
+                paged_table(table_view.get_view(export_key('facility-table'), facility_summary), "facility")
+            export_control("📥 Download Facility-wise Excel", "FacilityWiseReport.xlsx", export_key('facility-xlsx'), pipeline.to_excel, facility_summary)
+            export_control("🧾 Download Facility-wise PDF", "FacilityWiseReport.pdf", export_key('facility-pdf'), pipeline.create_pdf, facility_summary, "Facility-wise Summary Report")
+            # One folder per district with its own facility-wise PDF and Excel, rendered across worker processes
+            export_control("📦 Download District Packs (ZIP)", "DistrictPacks.zip", export_key('district-packs'), district_packs.build_zip, facility_summary)
         with col_summary2:
             st.markdown('<div class="subheader">📊 District-wise Summary</div>', unsafe_allow_html=True)
-            st.markdown('<div class="summary-container">', unsafe_allow_html=True)
-            st.dataframe(district_summary.fillna(0))
-            st.markdown('</div>', unsafe_allow_html=True)
-            st.download_button("📥 Download District-wise Excel", to_excel(district_summary), file_name="DistrictWiseReport.xlsx")
-            st.download_button("🧾 Download District-wise PDF", create_pdf(district_summary, "District-wise Summary Report"), file_name="DistrictWiseReport.pdf")
-            st.download_button("📤 Download Combined Excel Report", to_combined_excel(facility_summary, district_summary, total_registered, total_reported), file_name="Combined_Footfall_Report.xlsx")
+            with st.container(key="summary-container-district"):
+                paged_table(table_view.get_view(export_key('district-table'), district_summary), "district")
+            export_control("📥 Download District-wise Excel", "DistrictWiseReport.xlsx", export_key('district-xlsx'), pipeline.to_excel, district_summary)
+            export_control("🧾 Download District-wise PDF", "DistrictWiseReport.pdf", export_key('district-pdf'), pipeline.create_pdf, district_summary, "District-wise Summary Report")
+            export_control("📤 Download Combined Excel Report", "Combined_Footfall_Report.xlsx", export_key('combined-xlsx'), pipeline.to_combined_excel, facility_summary, district_summary, total_registered, total_reported)
+
+        # Consecutive periods side by side from one grouped pass, instead of one report per date range
+        st.markdown('<div class="subheader">📆 Period Comparison</div>', unsafe_allow_html=True)
+        col_kind, col_count = st.columns([2, 1])
+        compare_kind = col_kind.selectbox(
+            "Compare",
+            options=[None] + list(pipeline.COMPARE_PERIODS),
+            format_func=lambda kind: pipeline.COMPARE_PERIODS[kind] if kind else "Off",
+            help="Periods are laid back to back and end on the To Date",
+            key="compare-kind"
+        )
+        compare_count = col_count.number_input("Periods", min_value=2, max_value=pipeline.MAX_PERIODS, value=2, step=1, key="compare-count")
+        if compare_kind == 'range' and not st.session_state.start_date <= st.session_state.end_date:
+            st.warning("Pick a From Date on or before the To Date to compare periods of that length.")
+        elif compare_kind:
+            with profiling.stage("comparison"):
+                labels, comparisons = pipeline.get_comparisons(
+                    input_key, source, master_df, compare_kind, compare_count, st.session_state.start_date, st.session_state.end_date
+                )
+            facility_comparison, district_comparison = comparisons[aam_type_filter]
+            st.caption(f"{' → '.join(labels)}. Δ and % Change are against the previous period; % Change shows 0 where the previous period had none.")
+            compare_key = f"comparison-{compare_kind}-{compare_count}"
+            with st.expander("Facility-wise comparison"):
+                paged_table(table_view.get_view(export_key(f"{compare_key}-facility-table"), facility_comparison), "comparison-facility")
+            paged_table(table_view.get_view(export_key(f"{compare_key}-district-table"), district_comparison), "comparison-district")
+            export_control("📥 Download Period Comparison Excel", "PeriodComparison.xlsx", export_key(f"{compare_key}-xlsx"), pipeline.to_comparison_excel, facility_comparison, district_comparison)
+
+        # Registered facilities matched by name (exact, then fuzzy) against those that reported
+        with profiling.stage("reconciliation"):
+            facility_matches, district_lists, unmatched_footfall = pipeline.get_reconciliation(summary_key, footfall_df_filtered, master_df, aam_type_filter)
+        st.markdown('<div class="subheader">🔎 Reported vs Unreported Facilities</div>', unsafe_allow_html=True)
+        st.dataframe(district_lists)
+        if len(unmatched_footfall):
+            with st.expander(f"{len(unmatched_footfall)} reporting facilities not found in the master"):
+                st.dataframe(unmatched_footfall)
+        export_control("📥 Download Facility Reconciliation Excel", "FacilityReconciliation.xlsx", export_key('reconciliation-xlsx'), pipeline.to_reconciliation_excel, facility_matches, district_lists, unmatched_footfall)
+
+        # Days each facility reported, from a facility x day presence bitmap, so duplicate rows count once
+        with profiling.stage("compliance"):
+            bitmap = compliance.get_bitmap(input_key, source)
+            facility_days, district_compliance, daily_compliance = pipeline.get_compliance(
+                summary_key, bitmap, master_df, aam_type_filter, st.session_state.start_date, st.session_state.end_date
+            )
+        st.markdown('<div class="subheader">📅 Reporting Compliance</div>', unsafe_allow_html=True)
+        st.dataframe(district_compliance, hide_index=True)
+        with st.expander("Daily compliance by district (% of registered facilities reporting)"):
+            st.dataframe(daily_compliance, hide_index=True)
+        paged_table(table_view.get_view(export_key('compliance-table'), facility_days, footer_rows=0), "compliance")
+        export_control("📥 Download Reporting Compliance Excel", "ReportingCompliance.xlsx", export_key('compliance-xlsx'), pipeline.to_compliance_excel, district_compliance, daily_compliance, facility_days)
+
+        # Facility-days of the current upload that were filed more than once
+        if duplicates is not None and len(duplicates):
+            st.markdown('<div class="subheader">🧹 Duplicate Entries</div>', unsafe_allow_html=True)
+            near = int((duplicates['Duplicate_Kind'] == 'near').sum())
+            st.caption(
+                f"{len(duplicates)} facility-days were submitted more than once ({near} with differing footfall); "
+                f"{int(duplicates['Entries_Removed'].sum())} entries removed under \"{dedup.POLICIES[duplicate_policy]}\"."
+            )
+            paged_table(table_view.get_view(export_key('duplicates-table'), duplicates, footer_rows=0), "duplicates")
+            export_control("📥 Download Duplicate Entries Excel", "DuplicateEntries.xlsx", export_key('duplicates-xlsx'), pipeline.to_excel, duplicates)
 
     except Exception as e:
+        logger.exception("report_failed")
         st.error(f"❌ Error processing files: {e}")
 else:
-    st.info("👆 Please upload both required files to generate the reports.")
\ No newline at end of file
+    st.info("👆 Please upload both required files to generate the reports.")
+
+if profile_run is not None:
+    profiling.finish_run(
+        profile_run,
+        aam_type=aam_type_filter,
+        start_date=st.session_state.start_date,
+        end_date=st.session_state.end_date,
+        footfall_files=len(footfall_files or []),
+        use_history=use_history,
+        duplicate_policy=duplicate_policy
+    )
+    st.session_state.pop('profile_run', None)
+    with st.sidebar:
+        st.subheader("⏱️ Profile")
+        st.caption(f"This rerun: {profile_run.wall_sec * 1000:.0f} ms wall, {profile_run.cpu_sec * 1000:.0f} ms CPU")
+        st.dataframe(profiling.stage_frame(profile_run), hide_index=True)
+        st.download_button(
+            f"Download profile history ({len(profiling.history())} runs, JSON)",
+            profiling.history_json(),
+            file_name="profile_history.json",
+            mime="application/json"
+        )
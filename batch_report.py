@@ -0,0 +1,127 @@
+import argparse
+import os
+import sys
+from concurrent.futures import as_completed
+from datetime import date
+
+import pandas as pd
+
+import daily_cube
+import dedup
+import ingest
+import pipeline
+import worker_pool
+
+# Headless report generation: parse the Daily_Entry and FPE_Entry files once, then fan
+# (date range, AAM type) jobs out across a process pool, each writing its Excel/PDF files.
+#
+#   python batch_report.py --footfall Daily_Entry.xlsx --master FPE_Entry.xlsx \
+#       --months 2025-01:2025-12 --out reports
+#
+# writes reports/2025-01-01_2025-01-31/AAM-UPHC/FacilityWiseReport.xlsx and so on.
+_worker = {}
+
+
+def parse_range(text):
+    try:
+        start, end = (date.fromisoformat(part) for part in text.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected START:END as YYYY-MM-DD:YYYY-MM-DD, got {text!r}")
+    if start > end:
+        raise argparse.ArgumentTypeError(f"range starts after it ends: {text!r}")
+    return start, end
+
+
+def parse_months(text):
+    try:
+        first, last = (pd.Period(part, freq='M') for part in text.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected FIRST:LAST as YYYY-MM:YYYY-MM, got {text!r}")
+    return [(month.start_time.date(), month.end_time.date()) for month in pd.period_range(first, last, freq='M')]
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return os.path.basename(path), f.read()
+
+
+def load_input(path, kind):
+    df, missing_cols, key = ingest.load_normalized(*read_file(path), kind)
+    if missing_cols:
+        raise SystemExit(f"Missing columns in {path}: {missing_cols}")
+    return df, key
+
+
+def load_footfall(paths):
+    df, missing_cols, key = ingest.load_footfall_uploads([read_file(path) for path in paths])
+    if missing_cols:
+        raise SystemExit(f"Missing columns in {', '.join(paths)}: {missing_cols}")
+    return df, key
+
+
+def _init_worker(cube, master_df):
+    _worker['cube'] = cube
+    _worker['master_df'] = master_df
+
+
+def run_job(start_date, end_date, aam_type, out_dir, kinds):
+    facility_totals = pipeline.range_totals(_worker['cube'], start_date, end_date)
+    total_registered, total_reported = pipeline.dashboard_totals(_worker['master_df'], facility_totals)
+    facility_summary, district_summary = pipeline.build_summaries(facility_totals, _worker['master_df'], aam_type)
+    job_dir = os.path.join(out_dir, f"{start_date}_{end_date}", aam_type)
+    return pipeline.write_reports(job_dir, kinds, facility_summary, district_summary, total_registered, total_reported)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate facility-wise and district-wise footfall reports without the UI")
+    parser.add_argument('--footfall', required=True, nargs='+', help="Daily_Entry (footfall) files, .xlsx/.xls/.csv; overlapping days are counted once")
+    parser.add_argument('--master', required=True, help="FPE_Entry (facility master) file, .xlsx/.xls/.csv")
+    parser.add_argument('--out', default='reports', help="output directory (default: reports)")
+    parser.add_argument('--range', dest='ranges', action='append', type=parse_range, default=[],
+                        metavar='START:END', help="report date range, repeatable")
+    parser.add_argument('--months', action='append', type=parse_months, default=[],
+                        metavar='FIRST:LAST', help="one report per calendar month, e.g. 2025-01:2025-12")
+    parser.add_argument('--aam-type', dest='aam_types', action='append', choices=pipeline.AAM_TYPES,
+                        help="AAM type to report on, repeatable (default: all)")
+    parser.add_argument('--reports', nargs='+', choices=list(pipeline.REPORT_FILES), default=list(pipeline.REPORT_FILES),
+                        help="report files to write for every job (default: all)")
+    parser.add_argument('--duplicates', choices=list(dedup.POLICIES), default=dedup.DEFAULT_POLICY,
+                        help="how re-submitted daily entries are handled (default: flag only, every entry counts)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    footfall_df, _ = load_footfall(args.footfall)
+    footfall_df, duplicates = dedup.deduplicate(footfall_df, args.duplicates)
+    if len(duplicates):
+        print(f"{len(duplicates)} facility-days submitted more than once, "
+              f"{int(duplicates['Entries_Removed'].sum())} entries removed ({args.duplicates})", file=sys.stderr)
+    master_df, _ = load_input(args.master, 'master')
+    cube = daily_cube.DailyCube(footfall_df)
+    del footfall_df
+
+    ranges = list(args.ranges) + [period for months in args.months for period in months]
+    if not ranges:
+        if cube.first_day is None:
+            parser.error("no dated footfall entries; pass --range or --months")
+        ranges = [(cube.first_day.date(), cube.last_day.date())]
+    jobs = [(start, end, aam_type) for start, end in ranges for aam_type in (args.aam_types or pipeline.AAM_TYPES)]
+
+    failures = 0
+    workers = max(1, min(args.workers or 1, len(jobs)))
+    with worker_pool.spawn_executor(workers, initializer=_init_worker, initargs=(cube, master_df)) as pool:
+        futures = {pool.submit(run_job, start, end, aam_type, args.out, args.reports): (start, end, aam_type) for start, end, aam_type in jobs}
+        for future in as_completed(futures):
+            start, end, aam_type = futures[future]
+            try:
+                paths = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"FAILED {start}..{end} {aam_type}: {e}", file=sys.stderr)
+                continue
+            print(f"{start}..{end} {aam_type}: {len(paths)} files in {os.path.dirname(paths[0])}" if paths else f"{start}..{end} {aam_type}: no files")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+# Parse results are cached on disk by content; every timed run starts from an empty cache
+os.environ['UPHC_CACHE_DIR'] = tempfile.mkdtemp(prefix='uphc-bench-cache-')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingest
+import parse_cache
+from synthetic import make_facilities, make_footfall
+
+# Several monthly Daily_Entry exports uploaded together should parse in roughly the time of
+# the largest one. Times the largest file alone, then all of them through the multi-file
+# ingest (worker pool already started, as in a running app), and reports the ratio.
+TARGET_RATIO = 1.5
+
+
+def monthly_exports(n_files, rows, file_format, facilities=2000):
+    fac = make_facilities(facilities)
+    files = []
+    for month in range(n_files):
+        df = make_footfall(fac, rows=rows, days=28, start=f"2025-{month % 12 + 1:02d}-01", seed=month)
+        if file_format == 'csv':
+            data = df.to_csv(index=False).encode()
+        else:
+            output = BytesIO()
+            df.to_excel(output, index=False, engine='xlsxwriter')
+            data = output.getvalue()
+        files.append((f"Daily_Entry_{month + 1:02d}.{file_format}", data))
+    return files
+
+
+def clear_cache():
+    shutil.rmtree(parse_cache.CACHE_DIR, ignore_errors=True)
+
+
+def timed(fn):
+    clear_cache()
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent parsing of several footfall uploads")
+    parser.add_argument('--files', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=150000, help="rows per file")
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='xlsx')
+    parser.add_argument('--target', type=float, default=TARGET_RATIO, help="maximum merged / largest time ratio")
+    args = parser.parse_args(argv)
+
+    files = monthly_exports(args.files, args.rows, args.format)
+    largest = max(files, key=lambda file: len(file[1]))
+    # Warm-up: starts the worker pool and imports the parsing modules in it
+    timed(lambda: ingest.load_footfall_uploads(files))
+
+    single = timed(lambda: ingest.load_normalized(*largest, 'footfall'))
+    merged = timed(lambda: ingest.load_footfall_uploads(files))
+    clear_cache()
+    ratio = merged / single
+    print(f"files={args.files} rows/file={args.rows} format={args.format} workers={ingest.INGEST_WORKERS} "
+          f"cpus={os.cpu_count()} largest={single:.2f}s merged={merged:.2f}s ratio={ratio:.2f} target<={args.target:.2f}")
+    return 0 if ratio <= args.target else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_cube
+import ingest
+import pipeline
+from synthetic import make_facilities, make_footfall, make_master
+
+# Times and memory-profiles each stage of the report pipeline on synthetic uploads of
+# increasing size, and compares the results with a stored baseline:
+#
+#   python benchmarks/suite.py --sizes 10k 1m --save-baseline   # record
+#   python benchmarks/suite.py --sizes 10k 1m                   # compare, exit 1 on regression
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_SIZES = ['10k', '1m', '10m']
+# A stage regresses when it is this much slower (or hungrier) than the baseline and the
+# absolute difference is above the noise floor
+TOLERANCE = 0.20
+TIME_FLOOR_SEC = 0.01
+MEMORY_FLOOR_BYTES = 1024 * 1024
+
+
+def parse_size(text):
+    text = text.lower().replace('_', '')
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1])
+    return int(float(text[:-1]) * scale) if scale else int(text)
+
+
+def measure(fn, memory=True):
+    gc.collect()
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    result = fn()
+    timing = {'wall_sec': time.perf_counter() - start_wall, 'cpu_sec': time.process_time() - start_cpu}
+    if memory:
+        # Separate pass: tracemalloc's bookkeeping would distort the timing above
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = fn()
+        timing['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, timing
+
+
+def run_size(rows, facilities, days, memory):
+    fac = make_facilities(facilities)
+    footfall_csv = make_footfall(fac, rows=rows, days=days).to_csv(index=False).encode()
+    master_csv = make_master(fac).to_csv(index=False).encode()
+    results = {}
+
+    def stage(name, fn):
+        value, results[name] = measure(fn, memory)
+        return value
+
+    footfall_df, _ = stage('ingest_footfall', lambda: ingest.normalize_frame(
+        ingest.read_upload('Daily_Entry.csv', footfall_csv), ingest.footfall_column_map, ingest.required_footfall_cols, 'Footfall'))
+    stage('ingest_footfall_streaming', lambda: ingest.stream_footfall_csv(footfall_csv))
+    master_df, _ = stage('ingest_master', lambda: ingest.normalize_frame(
+        ingest.read_upload('FPE_Entry.csv', master_csv), ingest.master_column_map, ingest.required_master_cols, 'Master'))
+    del footfall_csv
+
+    cube = stage('cube_build', lambda: daily_cube.DailyCube(footfall_df))
+    first, last = cube.first_day.date(), cube.last_day.date()
+    from_date = first + (last - first) / 4
+    facility_totals = stage('date_filter', lambda: pipeline.range_totals(cube, from_date, last))
+    total_registered, total_reported = stage('dashboard', lambda: pipeline.dashboard_totals(master_df, facility_totals))
+    summaries = stage('summaries', lambda: pipeline.summaries_by_type(facility_totals, master_df))
+
+    facility_summary, district_summary = summaries['AAM-USHC']
+    stage('to_excel', lambda: pipeline.to_excel(facility_summary))
+    stage('create_pdf', lambda: pipeline.create_pdf(facility_summary, "Facility-wise Summary Report"))
+    stage('to_combined_excel', lambda: pipeline.to_combined_excel(facility_summary, district_summary, total_registered, total_reported))
+    return results
+
+
+def compare(current, baseline, tolerance):
+    regressions = []
+    for size, stages in current.items():
+        for stage, metrics in stages.items():
+            before = baseline.get(size, {}).get(stage)
+            if not before:
+                continue
+            for metric, floor in [('wall_sec', TIME_FLOOR_SEC), ('peak_bytes', MEMORY_FLOOR_BYTES)]:
+                if metric not in metrics or metric not in before:
+                    continue
+                old, new = before[metric], metrics[metric]
+                if new > old * (1 + tolerance) and new - old > floor:
+                    regressions.append((size, stage, metric, old, new))
+    return regressions
+
+
+def print_table(results):
+    print(f"{'size':>6}  {'stage':<26}{'wall s':>9}{'cpu s':>9}{'peak MiB':>10}")
+    for size, stages in results.items():
+        for stage, m in stages.items():
+            peak = f"{m['peak_bytes'] / 2 ** 20:10.1f}" if 'peak_bytes' in m else f"{'-':>10}"
+            print(f"{size:>6}  {stage:<26}{m['wall_sec']:9.3f}{m['cpu_sec']:9.3f}{peak}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the footfall report pipeline")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="footfall rows, e.g. 10k 1m 10m")
+    parser.add_argument('--facilities', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--output', help="also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        results[size] = run_size(parse_size(size), args.facilities, args.days, not args.no_memory)
+    print_table(results)
+
+    report = {'python': platform.python_version(), 'machine': platform.machine(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --save-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.tolerance)
+    for size, stage, metric, old, new in regressions:
+        print(f"REGRESSION {size} {stage} {metric}: {old:,.3f} -> {new:,.3f} ({new / old - 1:+.0%})")
+    if not regressions:
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Synthetic Daily_Entry (footfall) and FPE_Entry (facility master) files for benchmarks.
+# Headers are drawn from the spellings the column maps accept (plus stray whitespace),
+# names and AAM types come in the mixed case/padding seen in real exports, and a share
+# of footfall rows are exact re-submissions of earlier ones.
+FOOTFALL_HEADERS = {
+    'Facility_Name': ['Facility Name', 'facility_name', ' Facility_Name '],
+    'AAM_Type': ['AAM Type', 'aam_type', 'AAM_Type '],
+    'District_Name': ['District', 'district_name', 'District_Name'],
+    'Entry_Date': ['Entry Date', 'entry_date', ' Entry_Date'],
+    'Footfall_Total': ['Footfall Total', 'footfall total', 'Footfall_Total'],
+    'Footfall_Female': ['Footfall Female ', 'footfall female', 'Footfall Female'],
+}
+MASTER_HEADERS = {
+    'Facility_Name': ['HFI_Name', 'HFI Name', 'facility name'],
+    'AAM_Type': ['FACILITY_TYPE', 'Facility Type', 'aam type'],
+    'District_Name': ['District_Name', 'District', 'district'],
+}
+AAM_TYPE_SPELLINGS = {
+    'AAM-UPHC': ['AAM-UPHC', 'aam uphc', ' UPHC', 'Aam-Uphc '],
+    'AAM-USHC': ['AAM-USHC', 'aam ushc', 'USHC ', 'Aam-Ushc'],
+}
+NOISE_COLUMNS = ['State_Name', 'Block_Name', 'NIN_ID', 'Submitted_By', 'Remarks']
+
+
+def _messy_spellings(names, messy):
+    # Per-facility variants of one canonical name: as-is, lower-cased, space padded
+    if not messy:
+        return np.array([names], dtype=object)
+    return np.array([names, [n.lower() for n in names], [f"  {n} " for n in names]], dtype=object)
+
+
+def _headers(variants, rng, messy):
+    return {canonical: (rng.choice(options) if messy else canonical) for canonical, options in variants.items()}
+
+
+def make_facilities(n_facilities=2000, n_districts=38, uphc_share=0.2, seed=0):
+    rng = np.random.default_rng(seed)
+    districts = np.array([f"DISTRICT {i:02d}" for i in range(n_districts)], dtype=object)
+    district_idx = rng.integers(0, n_districts, n_facilities)
+    aam_type = np.where(rng.random(n_facilities) < uphc_share, 'AAM-UPHC', 'AAM-USHC')
+    names = [f"{kind[4:]} {districts[d][9:]}-{i:05d}" for i, (kind, d) in enumerate(zip(aam_type, district_idx))]
+    return pd.DataFrame({
+        'Facility_Name': names,
+        'AAM_Type': aam_type,
+        'District_Name': districts[district_idx],
+    })
+
+
+def make_master(facilities, messy=True, noise_columns=2, seed=0):
+    rng = np.random.default_rng(seed + 1)
+    n = len(facilities)
+    spellings = _messy_spellings(facilities['Facility_Name'].tolist(), messy)
+    names = spellings[rng.integers(0, len(spellings), n), np.arange(n)]
+    aam_types = facilities['AAM_Type'].map(
+        lambda t: rng.choice(AAM_TYPE_SPELLINGS[t]) if messy else t
+    )
+    headers = _headers(MASTER_HEADERS, rng, messy)
+    master = pd.DataFrame({
+        headers['Facility_Name']: names,
+        headers['AAM_Type']: aam_types.to_numpy(),
+        headers['District_Name']: facilities['District_Name'].to_numpy(),
+    })
+    for col in NOISE_COLUMNS[:noise_columns]:
+        master[col] = 'x'
+    return master
+
+
+def make_footfall(facilities, rows=10000, days=365, start='2025-01-01', duplicate_rate=0.02,
+                  messy=True, noise_columns=2, seed=0):
+    rng = np.random.default_rng(seed + 2)
+    n_facilities = len(facilities)
+    unique_rows = max(1, int(rows * (1 - duplicate_rate)))
+
+    facility_idx = rng.integers(0, n_facilities, unique_rows)
+    day_idx = rng.integers(0, days, unique_rows)
+    total = rng.poisson(60, unique_rows)
+    female = rng.binomial(total, 0.52)
+    # Re-submissions: exact copies of rows drawn from the unique ones
+    copies = rng.integers(0, unique_rows, rows - unique_rows)
+    facility_idx = np.concatenate([facility_idx, facility_idx[copies]])
+    day_idx = np.concatenate([day_idx, day_idx[copies]])
+    total = np.concatenate([total, total[copies]])
+    female = np.concatenate([female, female[copies]])
+
+    # Categoricals keep 10M-row frames small until they are written out
+    spellings = _messy_spellings(facilities['Facility_Name'].tolist(), messy)
+    variant = rng.integers(0, len(spellings), rows)
+    names = pd.Categorical.from_codes(variant * n_facilities + facility_idx, categories=spellings.ravel())
+    aam_spellings = {t: AAM_TYPE_SPELLINGS[t] if messy else [t] for t in AAM_TYPE_SPELLINGS}
+    aam_categories = [s for t in ('AAM-UPHC', 'AAM-USHC') for s in aam_spellings[t]]
+    aam_offset = np.where(facilities['AAM_Type'].to_numpy() == 'AAM-UPHC', 0, len(aam_spellings['AAM-UPHC']))
+    aam_variant = rng.integers(0, len(aam_spellings['AAM-UPHC']), rows)
+    aam_types = pd.Categorical.from_codes(aam_offset[facility_idx] + aam_variant, categories=aam_categories)
+    districts = pd.Categorical(facilities['District_Name'].to_numpy()[facility_idx])
+    dates = pd.Categorical.from_codes(
+        day_idx, categories=pd.date_range(start, periods=days, freq='D').strftime('%Y-%m-%d')
+    )
+
+    headers = _headers(FOOTFALL_HEADERS, rng, messy)
+    footfall = pd.DataFrame({
+        headers['Facility_Name']: names,
+        headers['AAM_Type']: aam_types,
+        headers['District_Name']: districts,
+        headers['Entry_Date']: dates,
+        headers['Footfall_Total']: total,
+        headers['Footfall_Female']: female,
+    })
+    for col in NOISE_COLUMNS[:noise_columns]:
+        footfall[col] = 'x'
+    return footfall.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def write_frame(df, path):
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic Daily_Entry and FPE_Entry files")
+    parser.add_argument('--out', default='synthetic')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--facilities', type=int, default=2000)
+    parser.add_argument('--districts', type=int, default=38)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--start', default='2025-01-01')
+    parser.add_argument('--duplicate-rate', type=float, default=0.02)
+    parser.add_argument('--clean', action='store_true', help="canonical headers and values")
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    facilities = make_facilities(args.facilities, args.districts, seed=args.seed)
+    master = make_master(facilities, messy=not args.clean, seed=args.seed)
+    footfall = make_footfall(facilities, args.rows, args.days, args.start, args.duplicate_rate,
+                             messy=not args.clean, seed=args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    for name, df in [('Daily_Entry', footfall), ('FPE_Entry', master)]:
+        path = os.path.join(args.out, f"{name}.{args.format}")
+        write_frame(df, path)
+        print(f"{path}: {len(df):,} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from memo import LRUMemo
+
+# Facility x day reporting presence, one bit per facility and day (np.packbits along the
+# day axis, so 50k facilities over a year is about 2.3 MB). A facility counts as reporting
+# on a day when it has at least one entry dated that day, however many duplicate rows it
+# filed. The day axis is the sorted distinct days on which any facility reported, as in
+# DailyCube, so a day without a single entry is not counted as missed by every facility.
+# Rows are kept sorted by district, so per-district daily counts are one np.add.reduceat
+# over the unpacked window.
+FACILITY_KEYS = ['District_Name', 'Facility_Name', 'AAM_Type']
+# Facilities unpacked at a time when deriving presence from a cube's prefix sums
+CHUNK_FACILITIES = 8192
+MAX_BITMAPS = 4
+
+_bitmaps = LRUMemo(MAX_BITMAPS)
+
+
+class ReportingBitmap:
+    def __init__(self, facilities, days, bits):
+        # facilities: FACILITY_KEYS frame, one row per bit row; days: sorted DatetimeIndex of
+        # the bit columns; bits: uint8 (facilities, ceil(days / 8))
+        codes = pd.Categorical(facilities['District_Name']).codes
+        order = np.argsort(codes, kind='stable')
+        self.facilities = facilities.iloc[order].reset_index(drop=True)
+        self.district_codes = codes[order]
+        self.bits = bits[order]
+        self.days = pd.DatetimeIndex(days)
+        self.n_days = len(self.days)
+
+    @classmethod
+    def from_days(cls, facilities, codes, day_index, days):
+        # codes/day_index: facility row and position in days of every reporting (facility, day)
+        presence = np.zeros((len(facilities), len(days)), dtype=bool)
+        presence[codes, day_index] = True
+        return cls(facilities, days, np.packbits(presence, axis=1))
+
+    @classmethod
+    def from_counts(cls, facilities, prefix_counts, days):
+        # prefix_counts: (facilities, days + 1) running Entry_Count per facility, as in DailyCube
+        bits = np.zeros((len(facilities), -(-len(days) // 8)), dtype=np.uint8)
+        for start in range(0, len(facilities), CHUNK_FACILITIES):
+            rows = slice(start, start + CHUNK_FACILITIES)
+            bits[rows] = np.packbits(np.diff(prefix_counts[rows], axis=1) > 0, axis=1)
+        return cls(facilities, days, bits)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def _day_offset(self, day):
+        # Index of the first bitmap day on or after day
+        return int(self.days.searchsorted(pd.Timestamp(day)))
+
+    def _span(self, start_date, end_date):
+        if start_date is None or end_date is None:
+            return 0, self.n_days
+        return self._day_offset(start_date), self._day_offset(pd.Timestamp(end_date) + pd.Timedelta(days=1))
+
+    def window(self, start_date=None, end_date=None, rows=None):
+        # Unpacked bool presence of the days in [start_date, end_date] that the bitmap covers;
+        # returns (dates, presence) with presence shaped (facilities, days)
+        i, j = self._span(start_date, end_date)
+        bits = self.bits if rows is None else self.bits[rows]
+        packed = bits[:, i // 8:-(-j // 8)]
+        presence = np.unpackbits(packed, axis=1)[:, i % 8:i % 8 + (j - i)].view(bool)
+        return self.days[i:j], presence
+
+    def _rows(self, aam_type):
+        if aam_type is None:
+            return np.arange(len(self.facilities))
+        return np.flatnonzero((self.facilities['AAM_Type'] == aam_type).to_numpy())
+
+    def facility_stats(self, start_date=None, end_date=None, aam_type=None):
+        # Per facility: days reported, days missed and the longest run of consecutive missed days
+        rows = self._rows(aam_type)
+        dates, presence = self.window(start_date, end_date, rows)
+        days_reported = presence.sum(axis=1)
+        stats = self.facilities.iloc[rows].reset_index(drop=True)
+        stats['Days_Reported'] = days_reported
+        stats['Days_Missed'] = len(dates) - days_reported
+        stats['Longest_Missing_Streak'] = longest_false_run(presence).astype(np.int64)
+        stats['%_Days_Reported'] = np.round(days_reported / max(len(dates), 1) * 100, 2)
+        return stats
+
+    def district_daily(self, start_date=None, end_date=None, aam_type=None, registered=None):
+        # Facilities reporting per district and day; with registered (facility count per
+        # district) the counts become compliance percentages. Indexed by date, one column per district.
+        rows = self._rows(aam_type)
+        dates, presence = self.window(start_date, end_date, rows)
+        if len(rows) == 0:
+            daily = pd.DataFrame(index=dates, dtype=np.int64)
+        else:
+            # Rows are sorted by district, so each district is one contiguous block
+            codes = self.district_codes[rows]
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            counts = np.add.reduceat(presence, starts, axis=0, dtype=np.int32)
+            districts = self.facilities['District_Name'].iloc[rows[starts]].astype(object)
+            daily = pd.DataFrame(counts.T, index=dates, columns=pd.Index(districts, dtype=object))
+        daily.index.name = 'Entry_Date'
+        if registered is None:
+            return daily
+        registered = registered.set_axis(registered.index.astype(object))
+        daily = daily.reindex(columns=registered.index.union(daily.columns, sort=False), fill_value=0)
+        denominator = registered.reindex(daily.columns).replace(0, np.nan)
+        return (daily / denominator * 100).round(2)
+
+
+def longest_false_run(presence):
+    # Longest run of False per row: one vectorized step per day across every row, so memory
+    # stays O(rows) however long the window is
+    run = np.zeros(len(presence), dtype=np.int32)
+    longest = np.zeros(len(presence), dtype=np.int32)
+    for reported in np.ascontiguousarray(presence.T):
+        run += 1
+        run[reported] = 0
+        np.maximum(longest, run, out=longest)
+    return longest
+
+
+def get_bitmap(key, source):
+    # source is a DailyCube or FootfallHistory; both build their bitmap on request
+    return _bitmaps.get(key, source.reporting_bitmap)
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import compliance
+from memo import LRUMemo
+
+# Facility x day cube of footfall totals, female footfall and entry counts, stored as
+# prefix sums along the date axis. The totals for any date range are then one subtraction
+# of two columns, so changing the report dates costs O(facilities) instead of O(rows).
+# The day axis holds only the distinct days that have entries, so a stray date far outside
+# the rest (a serial number read as 1900, a year typo) adds one column, not decades of them.
+# Whole-number measures are stored as int32 while every facility's total fits, so a cube of
+# 50k facilities over a year takes about 220 MB rather than 440 MB; the memo of built cubes
+# is bounded by their size, not by how many there are.
+FACILITY_KEYS = ['District_Name', 'Facility_Name', 'AAM_Type']
+MEASURES = ['Footfall_Total', 'Footfall_Female', 'Entry_Count']
+MAX_CUBE_BYTES = int(os.environ.get('UPHC_CUBE_MEMO_BYTES', 1024 * 1024 * 1024))
+
+_cubes = LRUMemo(max_bytes=MAX_CUBE_BYTES, weigh=lambda cube: cube.nbytes)
+
+
+def _measure_values(column, codes, n_facilities):
+    # One measure's values with blanks as 0. Whole numbers come back as int32, or as int64 when
+    # some facility's total (and so its largest prefix sum) would overflow int32.
+    values = pd.to_numeric(column, errors='coerce').fillna(0).to_numpy()
+    if values.dtype.kind == 'f' and not np.all(np.mod(values, 1) == 0):
+        return values.astype(np.float64, copy=False)
+    values = values.astype(np.int64, copy=False)
+    magnitude = np.zeros(n_facilities, dtype=np.int64)
+    np.add.at(magnitude, codes, np.abs(values))
+    if magnitude.max(initial=0) <= np.iinfo(np.int32).max:
+        return values.astype(np.int32)
+    return values
+
+
+class DailyCube:
+    def __init__(self, footfall_df):
+        codes = footfall_df.groupby(FACILITY_KEYS, dropna=False, sort=False, observed=True).ngroup().to_numpy()
+        _, first_rows = np.unique(codes, return_index=True)
+        self.facilities = footfall_df[FACILITY_KEYS].iloc[first_rows].reset_index(drop=True)
+        n_facilities = len(self.facilities)
+
+        days = footfall_df['Entry_Date'].dt.normalize()
+        dated = days.notna().to_numpy()
+        # Sorted distinct days with entries; column k of the cube is self.days[k]
+        day_index, self.days = pd.factorize(days[dated], sort=True)
+        self.days = pd.DatetimeIndex(self.days)
+        self.n_days = len(self.days)
+        self.first_day = self.days[0] if self.n_days else None
+        self.last_day = self.days[-1] if self.n_days else None
+
+        cells = codes[dated] * self.n_days + day_index
+        self.prefix = {}
+        self.undated = {}
+        for measure in MEASURES:
+            values = _measure_values(footfall_df[measure], codes, n_facilities)
+            dtype = values.dtype
+            daily = np.zeros(n_facilities * self.n_days, dtype=dtype)
+            np.add.at(daily, cells, values[dated])
+            # Leading zero column so range [i, j) is prefix[:, j] - prefix[:, i]
+            prefix = np.zeros((n_facilities, self.n_days + 1), dtype=dtype)
+            np.cumsum(daily.reshape(n_facilities, self.n_days), axis=1, dtype=dtype, out=prefix[:, 1:])
+            self.prefix[measure] = prefix
+            self.undated[measure] = np.zeros(n_facilities, dtype=dtype)
+            np.add.at(self.undated[measure], codes[~dated], values[~dated])
+
+    @property
+    def nbytes(self):
+        arrays = list(self.prefix.values()) + list(self.undated.values())
+        return sum(a.nbytes for a in arrays) + int(self.facilities.memory_usage(deep=True).sum())
+
+    def day_bounds(self):
+        # (first, last) day with entries, or (None, None); same as FootfallHistory.day_bounds
+        return self.first_day, self.last_day
+
+    def _day_offset(self, day):
+        # Index of the first cube day on or after day
+        return int(self.days.searchsorted(pd.Timestamp(day)))
+
+    def range_totals(self, start_date=None, end_date=None):
+        # Per-facility totals for entries dated within [start_date, end_date]; without a
+        # range every entry counts, including those whose Entry_Date did not parse
+        if start_date is None or end_date is None:
+            totals = {m: self.prefix[m][:, -1] + self.undated[m] for m in MEASURES}
+        elif self.n_days == 0:
+            totals = {m: np.zeros(len(self.facilities), dtype=self.prefix[m].dtype) for m in MEASURES}
+        else:
+            i = self._day_offset(start_date)
+            j = self._day_offset(pd.Timestamp(end_date) + pd.Timedelta(days=1))
+            totals = {m: self.prefix[m][:, j] - self.prefix[m][:, i] for m in MEASURES}
+
+        reported = totals['Entry_Count'] > 0
+        result = self.facilities[reported].reset_index(drop=True)
+        for measure in MEASURES:
+            result[measure] = totals[measure][reported]
+        return result
+
+    def period_totals(self, edges):
+        # Per-facility totals of each period [edges[k], edges[k + 1]), one row per facility and
+        # period with entries. The prefix sums read at the period edges bin every day at once.
+        columns = FACILITY_KEYS + ['Period'] + MEASURES
+        if self.n_days == 0 or len(edges) < 2:
+            return pd.DataFrame(columns=columns)
+        offsets = [self._day_offset(edge) for edge in edges]
+        totals = {m: np.diff(self.prefix[m][:, offsets], axis=1) for m in MEASURES}
+        facility, period = np.nonzero(totals['Entry_Count'] > 0)
+        result = self.facilities.iloc[facility].reset_index(drop=True)
+        result['Period'] = period
+        for measure in MEASURES:
+            result[measure] = totals[measure][facility, period]
+        return result[columns]
+
+    def reporting_bitmap(self):
+        # Facility x day presence (Entry_Count > 0), read off the Entry_Count prefix sums
+        return compliance.ReportingBitmap.from_counts(self.facilities, self.prefix['Entry_Count'], self.days)
+
+
+def get_cube(key, footfall_df):
+    return _cubes.get(key, DailyCube, footfall_df)
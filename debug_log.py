@@ -0,0 +1,119 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+# Structured (JSON lines) diagnostics for the report app. Records are handed to a queue on
+# the calling thread and written by a background listener into a size-rotated file, so a
+# Streamlit rerun never blocks on log I/O. Set UPHC_LOG_LEVEL=DEBUG for the data statistics.
+# Only the main process opens the log file; spawned workers started with init_worker send
+# their records over a multiprocessing queue to a second listener in the main process.
+LOG_FILE = os.environ.get('UPHC_LOG_FILE', 'debug.log')
+LOG_LEVEL = os.environ.get('UPHC_LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = int(os.environ.get('UPHC_LOG_MAX_BYTES', 5 * 1024 * 1024))
+LOG_BACKUPS = int(os.environ.get('UPHC_LOG_BACKUPS', 3))
+
+logger = logging.getLogger('uphc')
+
+_worker_queue = None
+_worker_queue_lock = threading.Lock()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'event': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class EventQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The stock prepare() folds the traceback into the message and drops exc_info. Keep
+        # the message as the bare event name and carry the traceback as text instead, so
+        # queued records hold no frames and the formatter can still write it as 'exc'.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _configure():
+    # Module state survives Streamlit reruns, so the listener is only started once per process.
+    # Spawned workers log through init_worker instead.
+    if getattr(logger, '_queue_listener', None) is not None or multiprocessing.parent_process() is not None:
+        return
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding='utf-8', delay=True
+    )
+    file_handler.setFormatter(JsonLinesFormatter())
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(EventQueueHandler(log_queue))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    logger._queue_listener = listener
+    logger._file_handler = file_handler
+
+
+def worker_queue():
+    # Queue for the initargs of a spawn pool (with initializer=init_worker); started on first
+    # use, with its own listener writing to the main process's log file
+    global _worker_queue
+    with _worker_queue_lock:
+        if _worker_queue is None:
+            _worker_queue = multiprocessing.get_context('spawn').Queue()
+            listener = logging.handlers.QueueListener(_worker_queue, logger._file_handler)
+            listener.start()
+            atexit.register(listener.stop)
+        return _worker_queue
+
+
+def init_worker(log_queue):
+    # Pool initializer: this worker's records go to the main process instead of the log file.
+    # Unpickling the initializer imports this module before the worker knows its parent, so a
+    # listener may already be running; the file itself is only opened by the first record.
+    listener = getattr(logger, '_queue_listener', None)
+    if listener is not None:
+        listener.stop()
+        atexit.unregister(listener.stop)
+        logger._queue_listener = None
+    logger.handlers.clear()
+    logger.addHandler(EventQueueHandler(log_queue))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+def debug_enabled():
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+def log_event(event, level=logging.INFO, **fields):
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
+
+
+def log_debug(event, **fields):
+    log_event(event, logging.DEBUG, **fields)
+
+
+_configure()
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+import ingest
+from debug_log import log_event
+from memo import LRUMemo
+
+# Duplicate submissions in the normalized footfall frame. Every row is hashed once
+# (pd.util.hash_pandas_object) on its facility and day, and once more with its per-entry
+# footfall values added; factorizing the two hashes gives the facility-day groups and the
+# exact-duplicate groups in a single vectorized pass, however many rows the upload has.
+# Exact duplicates repeat a facility's day with the same values; near duplicates are a
+# facility-day submitted more than once with different values (a corrected resubmission).
+# Entries without an Entry_Date have no day to collide on and only count as exact duplicates.
+FACILITY_KEYS = ['District_Name', 'Facility_Name', 'AAM_Type']
+VALUE_COLS = ingest.FOOTFALL_VALUE_COLS
+
+# Policy name -> label shown in the app. "Latest" is by row order; large CSVs are folded while
+# streaming, where identical entries keep the position of their first occurrence.
+POLICIES = {
+    'flag': "Count every entry (flag duplicates only)",
+    'exact': "Collapse exact duplicates",
+    'latest': "Keep the latest entry per facility-day",
+    'max': "Keep the highest-footfall entry per facility-day",
+}
+DEFAULT_POLICY = 'flag'
+MAX_RESULTS = 4
+
+_results = LRUMemo(MAX_RESULTS)
+
+
+def _group_ids(columns):
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+    return pd.factorize(hashes)[0]
+
+
+def _last_rows(groups, rows=None):
+    # Last of the given rows (default: all) in each group, in row order
+    rows = np.arange(len(groups)) if rows is None else rows
+    return rows[~pd.Series(groups[rows]).duplicated(keep='last').to_numpy()]
+
+
+def deduplicate(df, policy=DEFAULT_POLICY):
+    # Returns (frame, report): the frame with duplicates collapsed per policy ('flag' leaves it
+    # as is) and one report row per facility-day that has duplicate or conflicting entries
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown duplicate policy: {policy}")
+    counts = df['Entry_Count'].to_numpy(dtype=np.int64)
+    per_entry = {col: df[col].to_numpy(dtype=np.float64) / np.maximum(counts, 1) for col in VALUE_COLS}
+    days = df['Entry_Date'].dt.normalize()
+    dated = days.notna().to_numpy()
+
+    keys = {col: df[col] for col in FACILITY_KEYS}
+    keys['Entry_Date'] = days
+    exact = _group_ids({**keys, **per_entry})
+    # Undated rows get their exact group as their facility-day, so they never pair up as near duplicates
+    day_groups = _group_ids(keys)
+    day_groups = np.where(dated, day_groups, day_groups.max(initial=-1) + 1 + exact)
+    day_groups = pd.factorize(day_groups)[0]
+
+    n_days = day_groups.max(initial=-1) + 1
+    entries = np.bincount(day_groups, weights=counts, minlength=n_days).astype(np.int64)
+    first_of_exact = ~pd.Series(exact).duplicated().to_numpy()
+    submissions = np.bincount(day_groups[first_of_exact], minlength=n_days)
+
+    if policy == 'flag':
+        result, kept = df, entries
+    else:
+        if policy == 'exact':
+            keep = first_of_exact
+        else:
+            if policy == 'latest':
+                last = _last_rows(day_groups)
+            else:
+                # Ties on the highest total keep the later entry
+                totals = pd.Series(np.nan_to_num(per_entry['Footfall_Total'], nan=-np.inf))
+                highest = totals.groupby(day_groups).transform('max').to_numpy()
+                last = _last_rows(day_groups, np.flatnonzero(totals.to_numpy() == highest))
+            keep = np.zeros(len(df), dtype=bool)
+            keep[last] = True
+            # Undated rows are only collapsed as exact duplicates
+            keep = np.where(dated, keep, first_of_exact)
+        result = df[keep].reset_index(drop=True)
+        collapsed = counts[keep] > 1
+        if collapsed.any():
+            result['Entry_Count'] = np.where(collapsed, 1, result['Entry_Count'])
+            for col in VALUE_COLS:
+                result[col] = np.where(collapsed, per_entry[col][keep], result[col])
+        for col in VALUE_COLS + ['Entry_Count']:
+            result[col] = ingest.downcast_counts(result[col])
+        kept = np.bincount(day_groups[keep], weights=result['Entry_Count'].to_numpy(dtype=np.int64), minlength=n_days).astype(np.int64)
+
+    report = duplicate_report(df, days, day_groups, entries, submissions, kept, per_entry['Footfall_Total'])
+    log_event(
+        "duplicates_checked",
+        policy=policy,
+        rows=len(df),
+        duplicate_days=len(report),
+        near_duplicate_days=int((report['Duplicate_Kind'] != 'exact').sum()),
+        entries_removed=int(report['Entries_Removed'].sum())
+    )
+    return result, report
+
+
+def duplicate_report(df, days, day_groups, entries, submissions, kept, totals):
+    # One row per facility-day with more than one entry: how many were filed, how many
+    # distinct value sets they carried and how many the policy removed
+    flagged = np.flatnonzero(entries > 1)
+    # Group ids follow first appearance, so the first row of group g is the g-th first row
+    first_row = np.flatnonzero(~pd.Series(day_groups).duplicated().to_numpy())
+    rows = first_row[flagged]
+
+    in_flagged = np.isin(day_groups, flagged)
+    low = pd.Series(totals[in_flagged]).groupby(day_groups[in_flagged]).min()
+    high = pd.Series(totals[in_flagged]).groupby(day_groups[in_flagged]).max()
+
+    report = df[FACILITY_KEYS].iloc[rows].reset_index(drop=True)
+    report['Entry_Date'] = days.iloc[rows].to_numpy()
+    report['Entries'] = entries[flagged]
+    report['Distinct_Submissions'] = submissions[flagged]
+    report['Duplicate_Kind'] = np.where(submissions[flagged] > 1, 'near', 'exact')
+    report['Min_Footfall_Total'] = low.reindex(flagged).to_numpy()
+    report['Max_Footfall_Total'] = high.reindex(flagged).to_numpy()
+    report['Entries_Removed'] = entries[flagged] - kept[flagged]
+    report = report.sort_values(FACILITY_KEYS + ['Entry_Date'], kind='stable').reset_index(drop=True)
+    report.insert(0, 'S.No.', range(1, len(report) + 1))
+    return report
+
+
+def policy_key(key, policy):
+    # Upload key of the deduplicated frame, for caches keyed on the footfall data
+    return key if policy == DEFAULT_POLICY else f"{key}|dedup-{policy}"
+
+
+def get_deduplicated(key, df, policy=DEFAULT_POLICY):
+    return _results.get((key, policy), deduplicate, df, policy)
@@ -0,0 +1,93 @@
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import exports
+import pipeline
+import worker_pool
+
+# Per-district report packs: the facility-wise summary is split by District_Name and each
+# district's PDF and Excel file is rendered in a worker process. Finished packs are written
+# into a ZIP spooled to a temporary file as they arrive and dropped, and only a few
+# districts are in flight at once, so memory holds a handful of artifacts rather than every
+# district's files. The export memo keeps only the ZIP's path.
+PACK_WORKERS = int(os.environ.get('UPHC_PACK_WORKERS', min(4, os.cpu_count() or 1)))
+# Districts queued per worker; more keeps workers busy, fewer bounds memory
+IN_FLIGHT_PER_WORKER = 2
+SUMMARY_COLS = ['District_Name', 'Facility_Name', 'AAM_Type', 'Footfall_Total', 'Footfall_Female']
+
+_pool = worker_pool.SpawnPool(PACK_WORKERS)
+
+
+def folder_name(district):
+    return re.sub(r'[^\w\-]+', '_', str(district)).strip('_') or 'Unknown_District'
+
+
+def unique_folder(district, used):
+    # Districts whose names sanitize alike ("A B" and "A_B") get _2, _3, ... so neither's files
+    # are overwritten; compared case-insensitively, as the ZIP may be extracted on Windows
+    base = folder = folder_name(district)
+    n = 1
+    while folder.lower() in used:
+        n += 1
+        folder = f"{base}_{n}"
+    used.add(folder.lower())
+    return folder
+
+
+def render_district(folder, district, rows):
+    # Worker: one district's facility-wise summary (own S.No. and Total row) as PDF and Excel
+    summary = pipeline.facility_summary_for(rows)
+    return [
+        (f"{folder}/{pipeline.REPORT_FILES['facility-pdf']}", pipeline.create_pdf(summary, f"Facility-wise Summary Report - {district}")),
+        (f"{folder}/{pipeline.REPORT_FILES['facility-xlsx']}", pipeline.to_excel(summary)),
+    ]
+
+
+def district_frames(facility_summary):
+    # (folder, district, facility rows) per district, in district order; the Total row is dropped
+    rows = facility_summary[facility_summary['S.No.'] != ''][SUMMARY_COLS]
+    used = set()
+    for district, group in rows.groupby('District_Name', sort=True, observed=True):
+        yield unique_folder(district, used), district, group.reset_index(drop=True)
+
+
+def _rendered(districts):
+    # Yields each district's files as soon as they are ready, with a bounded number in flight
+    if PACK_WORKERS <= 1:
+        # A single worker process would only add pickling overhead
+        for item in districts:
+            yield render_district(*item)
+        return
+    pool = _pool.get()
+    pending = set()
+    for item in districts:
+        pending.add(pool.submit(render_district, *item))
+        if len(pending) >= PACK_WORKERS * IN_FLIGHT_PER_WORKER:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+    for future in pending:
+        yield future.result()
+
+
+def build_zip(facility_summary, progress=None):
+    # Returns an exports.SpooledFile holding the ZIP
+    total = facility_summary['District_Name'][facility_summary['S.No.'] != ''].nunique() or 1
+    fd, path = tempfile.mkstemp(prefix='uphc-district-packs-', suffix='.zip')
+    artifact = exports.SpooledFile(path)
+    try:
+        with os.fdopen(fd, 'wb') as output, zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for done, files in enumerate(_rendered(district_frames(facility_summary)), start=1):
+                for name, data in files:
+                    archive.writestr(name, data)
+                if progress:
+                    progress(min(done / total, 0.99))
+    except BaseException:
+        artifact.remove()
+        raise
+    if progress:
+        progress(1.0)
+    return artifact
@@ -0,0 +1,94 @@
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Report artifacts are built only when requested, on a shared background pool, and the
+# resulting bytes are memoized per (input hash, date range, AAM type, format). The pool
+# and memo live at module level so they survive Streamlit reruns and are shared by sessions.
+# Builders of large artifacts return a SpooledFile instead of bytes; the memo then keeps
+# only its path, and the file is deleted when the artifact is evicted or discarded.
+EXPORT_WORKERS = int(os.environ.get('UPHC_EXPORT_WORKERS', 2))
+MAX_ARTIFACTS = int(os.environ.get('UPHC_EXPORT_MEMO_SIZE', 32))
+
+_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix='export')
+_jobs = OrderedDict()
+_lock = threading.Lock()
+
+
+class SpooledFile:
+    # An artifact written to a temporary file rather than held in memory
+    def __init__(self, path):
+        self.path = path
+
+    def open(self):
+        return open(self.path, 'rb')
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _release(job):
+    # Deletes the spooled file of a finished job; byte artifacts are simply dropped
+    future = job['future']
+    if future.done() and not future.cancelled() and future.exception() is None:
+        result = future.result()
+        if isinstance(result, SpooledFile):
+            result.remove()
+
+
+def export_key(input_key, start_date, end_date, aam_type, fmt):
+    return (input_key, str(start_date), str(end_date), aam_type, fmt)
+
+
+def _evict():
+    # Oldest finished artifacts go first; in-flight builds are never dropped
+    for key in list(_jobs):
+        if len(_jobs) <= MAX_ARTIFACTS:
+            break
+        if _jobs[key]['future'].done():
+            _release(_jobs.pop(key))
+
+
+def request_export(key, builder, *args):
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None:
+            _jobs.move_to_end(key)
+            return job
+
+        job = {'progress': 0.0}
+
+        def report(fraction):
+            job['progress'] = min(max(float(fraction), 0.0), 1.0)
+
+        job['future'] = _executor.submit(builder, *args, progress=report)
+        _jobs[key] = job
+        _evict()
+    return job
+
+
+def get_export(key):
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None:
+            _jobs.move_to_end(key)
+        return job
+
+
+def discard(key):
+    with _lock:
+        job = _jobs.pop(key, None)
+    if job is not None:
+        _release(job)
+
+
+@atexit.register
+def _remove_spooled():
+    with _lock:
+        for job in _jobs.values():
+            _release(job)
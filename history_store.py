@@ -0,0 +1,311 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import compliance
+import ingest
+from debug_log import log_event
+
+# Local footfall history in SQLite. Normalized uploads are folded to one row per facility
+# and day and upserted, so a day that is uploaded again replaces its earlier totals and an
+# unchanged re-upload writes nothing. Date-range totals are indexed range queries over the
+# stored days. The facility master is kept alongside and replaced by each master upload.
+# The app shares one store per process (get_history) and the database file is only created
+# once something is written to it or read from it, never just by checking whether it has data.
+HISTORY_DB = os.environ.get(
+    'UPHC_HISTORY_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'footfall_history.sqlite3')
+)
+KEY_COLS = ['District_Name', 'Facility_Name', 'AAM_Type']
+VALUE_COLS = ['Footfall_Total', 'Footfall_Female', 'Entry_Count']
+
+_history = None
+_history_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facility (
+    facility_id INTEGER PRIMARY KEY,
+    Facility_Name TEXT NOT NULL,
+    District_Name TEXT NOT NULL,
+    AAM_Type TEXT NOT NULL,
+    UNIQUE (Facility_Name, District_Name, AAM_Type)
+);
+CREATE TABLE IF NOT EXISTS footfall (
+    Entry_Date TEXT NOT NULL,
+    facility_id INTEGER NOT NULL REFERENCES facility,
+    Footfall_Total NUMERIC NOT NULL,
+    Footfall_Female NUMERIC NOT NULL,
+    Entry_Count INTEGER NOT NULL,
+    PRIMARY KEY (Entry_Date, facility_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS facility_master (
+    District_Name TEXT,
+    Facility_Name TEXT,
+    AAM_Type TEXT
+);
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    loaded_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Only rows whose totals differ are rewritten, so total_changes counts new or changed days
+UPSERT_DAY = """
+INSERT INTO footfall (Entry_Date, facility_id, Footfall_Total, Footfall_Female, Entry_Count)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (Entry_Date, facility_id) DO UPDATE SET
+    Footfall_Total = excluded.Footfall_Total,
+    Footfall_Female = excluded.Footfall_Female,
+    Entry_Count = excluded.Entry_Count
+WHERE Footfall_Total IS NOT excluded.Footfall_Total
+   OR Footfall_Female IS NOT excluded.Footfall_Female
+   OR Entry_Count IS NOT excluded.Entry_Count
+"""
+
+# Days lead the primary key, so a date range is one contiguous scan of the table
+RANGE_TOTALS = """
+SELECT facility_id,
+       SUM(Footfall_Total) AS Footfall_Total,
+       SUM(Footfall_Female) AS Footfall_Female,
+       SUM(Entry_Count) AS Entry_Count
+FROM footfall
+{where}
+GROUP BY facility_id
+HAVING SUM(Entry_Count) > 0
+"""
+
+# Stored days in [first, end) with entries, for binning into comparison periods
+DAYS_IN_SPAN = """
+SELECT facility_id, Entry_Date, Footfall_Total, Footfall_Female, Entry_Count
+FROM footfall
+WHERE Entry_Date >= ? AND Entry_Date < ? AND Entry_Count > 0
+"""
+
+# Facilities with entries on each stored day that has any, in date order
+PRESENCE_BY_DAY = """
+SELECT Entry_Date, COUNT(*), group_concat(facility_id)
+FROM footfall
+WHERE Entry_Count > 0
+GROUP BY Entry_Date
+ORDER BY Entry_Date
+"""
+
+
+def _key_values(values):
+    # Key columns are TEXT: names are stored as strings (a numeric district code 5 as '5', so
+    # it matches when read back) and missing names as '' because they cannot be NULL
+    return values.astype(object).where(values.notna(), '').astype(str)
+
+
+def _key_category(values):
+    return ingest.to_category(values.replace('', np.nan))
+
+
+def daily_totals(footfall_df):
+    # Footfall summed per facility and day. Entries without a parseable Entry_Date have no
+    # day to be keyed on and are left out; the second value is how many were dropped.
+    dated = footfall_df[footfall_df['Entry_Date'].notna()]
+    daily = dated.assign(Entry_Date=dated['Entry_Date'].dt.normalize()).groupby(
+        KEY_COLS + ['Entry_Date'], dropna=False, sort=False, observed=True
+    )[VALUE_COLS].sum().reset_index()
+    for col in KEY_COLS:
+        daily[col] = _key_values(daily[col])
+    return daily, len(footfall_df) - len(dated)
+
+
+class FootfallHistory:
+    def __init__(self, path=None):
+        self.path = path or HISTORY_DB
+        self._ready = False
+        self._setup_lock = threading.Lock()
+
+    def _connect(self):
+        # The schema (and WAL mode, which the database file keeps) is set up on the first
+        # connection, and again if the file has since been deleted to start over, so every
+        # other query only pays for opening a connection
+        with self._setup_lock:
+            if not self._ready or not self.exists():
+                with closing(sqlite3.connect(self.path)) as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(SCHEMA)
+                self._ready = True
+        return closing(sqlite3.connect(self.path))
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _meta(self, conn, name, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _bump_revision(self, conn):
+        revision = int(self._meta(conn, 'revision', 0)) + 1
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('revision', ?)", (str(revision),))
+
+    def _record_upload(self, conn, upload_key, kind, rows, changed):
+        conn.execute(
+            "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?)",
+            (upload_key, kind, rows, changed, datetime.now(timezone.utc).isoformat(timespec='seconds'))
+        )
+        if changed:
+            self._bump_revision(conn)
+
+    def revision(self):
+        # Changes whenever stored footfall or master rows change; part of the export memo key
+        with self._connect() as conn:
+            return int(self._meta(conn, 'revision', 0))
+
+    def has_footfall(self):
+        if not self.exists():
+            return False
+        with self._connect() as conn:
+            return conn.execute("SELECT EXISTS (SELECT 1 FROM footfall)").fetchone()[0] == 1
+
+    def has_master(self):
+        if not self.exists():
+            return False
+        with self._connect() as conn:
+            return self._meta(conn, 'master_upload') is not None
+
+    def _facilities(self, conn):
+        return pd.read_sql_query("SELECT facility_id, District_Name, Facility_Name, AAM_Type FROM facility", conn)
+
+    def _facility_ids(self, conn, daily):
+        # Registers facilities not seen before and returns the facility_id of every row
+        keys = daily[KEY_COLS].drop_duplicates()
+        conn.executemany(
+            "INSERT OR IGNORE INTO facility (District_Name, Facility_Name, AAM_Type) VALUES (?, ?, ?)",
+            keys.itertuples(index=False, name=None)
+        )
+        ids = daily[KEY_COLS].merge(self._facilities(conn), on=KEY_COLS, how='left')['facility_id']
+        if ids.isna().any():
+            raise ValueError(f"{int(ids.isna().sum())} footfall rows did not match a stored facility")
+        return ids.to_numpy(dtype=np.int64)
+
+    def append_footfall(self, upload_key, footfall_df):
+        # Returns the number of facility-days added or changed. Repeating the latest upload is
+        # skipped; an older one is applied again, since later uploads may have replaced its days.
+        with self._connect() as conn, conn:
+            if self._meta(conn, 'footfall_upload') == upload_key:
+                return 0
+            daily, undated = daily_totals(footfall_df)
+            facility_ids = self._facility_ids(conn, daily)
+            before = conn.total_changes
+            conn.executemany(UPSERT_DAY, zip(
+                daily['Entry_Date'].dt.strftime('%Y-%m-%d').tolist(),
+                facility_ids.tolist(),
+                *[daily[col].tolist() for col in VALUE_COLS]
+            ))
+            changed = conn.total_changes - before
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('footfall_upload', ?)", (upload_key,))
+            self._record_upload(conn, upload_key, 'footfall', len(daily), changed)
+        log_event("history_appended", upload=upload_key, days=len(daily), changed=changed, undated_entries=undated)
+        return changed
+
+    def replace_master(self, upload_key, master_df):
+        with self._connect() as conn, conn:
+            if self._meta(conn, 'master_upload') == upload_key:
+                return False
+            conn.execute("DELETE FROM facility_master")
+            conn.executemany(
+                "INSERT INTO facility_master VALUES (?, ?, ?)",
+                zip(*[master_df[col].astype(object).where(master_df[col].notna(), None).tolist() for col in KEY_COLS])
+            )
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('master_upload', ?)", (upload_key,))
+            self._record_upload(conn, upload_key, 'master', len(master_df), len(master_df))
+        log_event("history_master_replaced", upload=upload_key, rows=len(master_df))
+        return True
+
+    def master(self):
+        with self._connect() as conn:
+            df = pd.read_sql_query("SELECT District_Name, Facility_Name, AAM_Type FROM facility_master", conn)
+        for col in KEY_COLS:
+            df[col] = ingest.to_category(df[col])
+        return df
+
+    def day_bounds(self):
+        # (first, last) stored day, or (None, None) when the history is empty
+        with self._connect() as conn:
+            first, last = conn.execute("SELECT MIN(Entry_Date), MAX(Entry_Date) FROM footfall").fetchone()
+        return (pd.Timestamp(first), pd.Timestamp(last)) if first else (None, None)
+
+    def range_totals(self, start_date=None, end_date=None):
+        # Same frame as DailyCube.range_totals: per-facility sums of the stored days in range
+        if start_date is None or end_date is None:
+            where, params = "", ()
+        else:
+            where = "WHERE Entry_Date BETWEEN ? AND ?"
+            params = tuple(pd.Timestamp(day).strftime('%Y-%m-%d') for day in (start_date, end_date))
+        with self._connect() as conn:
+            totals = pd.read_sql_query(RANGE_TOTALS.format(where=where), conn, params=params)
+            facilities = self._facilities(conn)
+        df = facilities.merge(totals, on='facility_id').drop(columns='facility_id')
+        for col in KEY_COLS:
+            df[col] = _key_category(df[col])
+        return df
+
+    def period_totals(self, edges):
+        # Same frame as DailyCube.period_totals: the stored days of the whole span are read
+        # once, each Entry_Date is binned into its period with one searchsorted, and one
+        # groupby sums them per facility and period
+        columns = KEY_COLS + ['Period'] + VALUE_COLS
+        if len(edges) < 2:
+            return pd.DataFrame(columns=columns)
+        edges = pd.DatetimeIndex(edges)
+        params = tuple(edge.strftime('%Y-%m-%d') for edge in (edges[0], edges[-1]))
+        with self._connect() as conn:
+            days = pd.read_sql_query(DAYS_IN_SPAN, conn, params=params)
+            facilities = self._facilities(conn)
+        period = np.searchsorted(edges.to_numpy(), pd.to_datetime(days['Entry_Date']).to_numpy(), side='right') - 1
+        totals = days.groupby([days['facility_id'], pd.Series(period, name='Period')])[VALUE_COLS].sum().reset_index()
+        df = facilities.merge(totals, on='facility_id').drop(columns='facility_id')
+        for col in KEY_COLS:
+            df[col] = _key_category(df[col])
+        return df[columns]
+
+    def reporting_bitmap(self):
+        # Facility x day presence of the stored days. Facility ids come back as one
+        # comma-joined string per day, which is far cheaper than one Python row per facility-day.
+        with self._connect() as conn:
+            facilities = self._facilities(conn)
+            per_day = conn.execute(PRESENCE_BY_DAY).fetchall()
+        if per_day:
+            days, counts, ids = zip(*per_day)
+            day_index = np.repeat(np.arange(len(days)), counts)
+            facility_ids = np.fromstring(','.join(ids), dtype=np.int64, sep=',')
+        else:
+            days = []
+            day_index = facility_ids = np.empty(0, dtype=np.int64)
+        rows = pd.Index(facilities['facility_id']).get_indexer(facility_ids)
+        keys = facilities[KEY_COLS].copy()
+        for col in KEY_COLS:
+            keys[col] = _key_category(keys[col])
+        return compliance.ReportingBitmap.from_days(keys, rows, day_index, pd.to_datetime(list(days)))
+
+    def clear(self):
+        with self._connect() as conn, conn:
+            for table in ('footfall', 'facility', 'facility_master', 'uploads'):
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute("DELETE FROM meta WHERE name IN ('master_upload', 'footfall_upload')")
+            self._bump_revision(conn)
+
+
+def get_history():
+    # One store per process, shared by every session and rerun
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = FootfallHistory()
+        return _history
@@ -0,0 +1,397 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import parse_cache
+import profiling
+import worker_pool
+import xlsx_reader
+from debug_log import debug_enabled, log_debug, log_event
+
+# Reading and normalization of the Daily_Entry (footfall) and FPE_Entry (facility master)
+# uploads. Large footfall CSVs can be streamed in chunks and folded straight into
+# per-facility, per-day partial sums instead of being loaded whole, and .xlsx uploads only
+# materialize the columns the column maps resolve to. Several footfall exports (e.g. one per
+# month) are parsed concurrently and merged into one frame: CSVs on threads, since the
+# tokenizer releases the GIL, and .xlsx files in worker processes, since their cell scan
+# is regex and list work that holds it.
+footfall_column_map = {
+    'Facility Name': 'Facility_Name',
+    'Facility_Name': 'Facility_Name',
+    'facility name': 'Facility_Name',
+    'facility_name': 'Facility_Name',
+    'AAM Type': 'AAM_Type',
+    'AAM_Type': 'AAM_Type',
+    'aam type': 'AAM_Type',
+    'aam_type': 'AAM_Type',
+    'UPHC': 'AAM_Type',
+    'USHC': 'AAM_Type',
+    'AAM_USHC': 'AAM_Type',
+    'AAM_UPHC': 'AAM_Type',
+    'District': 'District_Name',
+    'District_Name': 'District_Name',
+    'district': 'District_Name',
+    'district_name': 'District_Name',
+    'Entry Date': 'Entry_Date',
+    'Entry_Date': 'Entry_Date',
+    'entry date': 'Entry_Date',
+    'entry_date': 'Entry_Date',
+    'Footfall Female': 'Footfall_Female',
+    'Footfall Female ': 'Footfall_Female',
+    'footfall female': 'Footfall_Female',
+    'Footfall Total': 'Footfall_Total',
+    'Footfall_Total': 'Footfall_Total',
+    'footfall total': 'Footfall_Total'
+}
+
+master_column_map = {
+    'HFI_Name': 'Facility_Name',
+    'HFI Name': 'Facility_Name',
+    'Facility_Name': 'Facility_Name',
+    'facility name': 'Facility_Name',
+    'facility_name': 'Facility_Name',
+    'FACILITY_TYPE': 'AAM_Type',
+    'Facility Type': 'AAM_Type',
+    'facility type': 'AAM_Type',
+    'AAM Type': 'AAM_Type',
+    'AAM_Type': 'AAM_Type',
+    'aam type': 'AAM_Type',
+    'aam_type': 'AAM_Type',
+    'UPHC': 'AAM_Type',
+    'USHC': 'AAM_Type',
+    'AAM_USHC': 'AAM_Type',
+    'AAM_UPHC': 'AAM_Type',
+    'District_Name': 'District_Name',
+    'District': 'District_Name',
+    'district': 'District_Name',
+    'district_name': 'District_Name'
+}
+
+required_footfall_cols = ['Facility_Name', 'AAM_Type', 'District_Name', 'Entry_Date', 'Footfall_Total', 'Footfall_Female']
+required_master_cols = ['Facility_Name', 'AAM_Type', 'District_Name']
+
+# Footfall rows are summed to this grain by the streaming ingest; Entry_Count keeps the
+# number of raw entries behind each row so "reported" counts stay the same either way.
+# Only entries with the same footfall values are folded together, so each row's values
+# divided by its Entry_Count are the per-entry values the duplicate check compares.
+AGGREGATE_KEYS = ['District_Name', 'Facility_Name', 'AAM_Type', 'Entry_Date']
+FOOTFALL_VALUE_COLS = ['Footfall_Total', 'Footfall_Female']
+
+# Bump whenever normalization changes so stale parse-cache entries are ignored
+NORMALIZE_VERSION = 5
+
+# How the column-pruned .xlsx reader types each required column; the rest are text
+COLUMN_KINDS = {'Entry_Date': 'date', 'Footfall_Total': 'number', 'Footfall_Female': 'number'}
+
+STREAM_CSV_BYTES = int(os.environ.get('UPHC_STREAM_CSV_BYTES', 64 * 1024 * 1024))
+STREAM_CHUNK_ROWS = int(os.environ.get('UPHC_STREAM_CHUNK_ROWS', 200_000))
+# Parsing threads (CSV) and processes (.xlsx) for multi-file uploads
+INGEST_WORKERS = int(os.environ.get('UPHC_INGEST_WORKERS', min(4, os.cpu_count() or 1)))
+
+_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix='ingest')
+_process_pool = worker_pool.SpawnPool(INGEST_WORKERS)
+
+
+def clean_columns(df):
+    df.columns = [col.strip() for col in df.columns]
+    return df
+
+
+# Standardize AAM_Type values to AAM-UPHC or AAM-USHC
+def standardize_aam_type(value):
+    if isinstance(value, str):
+        value = value.strip().upper()
+        if 'UPHC' in value:
+            return 'AAM-UPHC'
+        if 'USHC' in value:
+            return 'AAM-USHC'
+    return value
+
+
+def log_frame_stats(stage, name, df):
+    # Full-column scans, so only computed when debug logging is on
+    if not debug_enabled():
+        return
+    log_debug(
+        "frame_stats",
+        stage=stage,
+        frame=name,
+        aam_types=df['AAM_Type'].unique().tolist(),
+        entries=len(df),
+        unique_facilities=df['Facility_Name'].nunique(),
+        sample_facilities=df['Facility_Name'].head().tolist()
+    )
+
+
+def read_upload(name, data):
+    if name.endswith(".csv"):
+        return pd.read_csv(BytesIO(data))
+    return pd.read_excel(BytesIO(data))
+
+
+def read_xlsx_columns(data, column_map, required_cols):
+    # Resolve the sniffed header first, then read only the columns it maps to required ones
+    sheet = xlsx_reader.SheetReader(data)
+    header = sheet.read_header()
+    selected, missing_cols = resolve_header(header.values(), column_map, required_cols)
+    if missing_cols:
+        return pd.DataFrame(columns=list(selected.values())), missing_cols
+    positions = {}
+    for index, raw in header.items():
+        if raw in selected and selected[raw] not in positions.values():
+            positions[index] = selected[raw]
+    df = sheet.read_columns({index: (target, COLUMN_KINDS.get(target, 'text')) for index, target in positions.items()})
+    log_debug("xlsx_columns_read", columns=len(header), read=len(positions), rows=len(df))
+    return df, []
+
+
+def read_normalized(name, data, column_map, required_cols, frame_name):
+    if name.endswith(".xlsx"):
+        df, missing_cols = read_xlsx_columns(data, column_map, required_cols)
+        if missing_cols:
+            return df, missing_cols
+    else:
+        df = read_upload(name, data)
+    return normalize_frame(df, column_map, required_cols, frame_name)
+
+
+def strip_upper(value):
+    # Same result as .str.strip().str.upper(), which turns non-strings into NaN
+    return value.strip().upper() if isinstance(value, str) else np.nan
+
+
+def to_category(values, normalize=None):
+    # Normalize each distinct value once and remap the integer codes, instead of per row
+    codes, uniques = pd.factorize(values)
+    if normalize is not None:
+        uniques = pd.Index([normalize(value) for value in uniques], dtype=object)
+    categories = uniques.dropna().unique()
+    try:
+        # Sorted categories keep groupby output in the same order as plain strings
+        categories = categories.sort_values()
+    except TypeError:
+        pass
+    remap = categories.get_indexer(uniques)
+    new_codes = np.full(len(codes), -1, dtype=np.int64)
+    present = codes >= 0
+    new_codes[present] = remap[codes[present]]
+    return pd.Categorical.from_codes(new_codes, categories=categories)
+
+
+def downcast_counts(values):
+    values = pd.to_numeric(values, errors='coerce')
+    if values.isna().any() or not (values % 1 == 0).all():
+        return values.astype(np.float64)
+    return pd.to_numeric(values, downcast='integer')
+
+
+def compact_keys(df):
+    df['AAM_Type'] = to_category(df['AAM_Type'], standardize_aam_type)
+    df['Facility_Name'] = to_category(df['Facility_Name'], strip_upper)
+    df['District_Name'] = to_category(df['District_Name'])
+    return df
+
+
+def fillna_zero(df):
+    # Categorical columns need 0 registered as a category before it can fill their gaps
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and df[col].isna().any():
+            df[col] = df[col].cat.add_categories([0])
+    return df.fillna(0)
+
+
+def standardize_footfall(df):
+    df = compact_keys(df)
+    with profiling.stage("to_datetime"):
+        df['Entry_Date'] = pd.to_datetime(df['Entry_Date'], errors='coerce')
+    for col in FOOTFALL_VALUE_COLS:
+        df[col] = downcast_counts(df[col])
+    df['Entry_Count'] = np.ones(len(df), dtype=np.int8)
+    return df
+
+
+def normalize_frame(df, column_map, required_cols, name):
+    df = clean_columns(df)
+    df.rename(columns={k: v for k, v in column_map.items() if k in df.columns}, inplace=True)
+
+    missing_cols = [col for col in required_cols if col not in df.columns]
+    if missing_cols:
+        return df, missing_cols
+
+    # Debug: Log raw data before standardization
+    log_frame_stats("raw", name, df)
+
+    if 'Entry_Date' in required_cols:
+        df = standardize_footfall(df)
+    else:
+        df = compact_keys(df)
+
+    # Debug: Log data after standardization
+    log_frame_stats("standardized", name, df)
+    return df, []
+
+
+def resolve_header(columns, column_map, required_cols):
+    # Map each required column to the first raw header that resolves to it
+    selected = {}
+    for raw in columns:
+        # Headers already spelled like the canonical name count even without a map entry
+        name = str(raw).strip()
+        target = column_map.get(name, name)
+        if target in required_cols and target not in selected.values():
+            selected[raw] = target
+    missing_cols = [col for col in required_cols if col not in selected.values()]
+    return selected, missing_cols
+
+
+def fold_partials(partials):
+    # Partials carry per-entry footfall values as keys; they become sums in stream_footfall_csv
+    combined = pd.concat(partials, ignore_index=True)
+    return combined.groupby(AGGREGATE_KEYS + FOOTFALL_VALUE_COLS, as_index=False, dropna=False, sort=False, observed=True)[
+        'Entry_Count'
+    ].sum()
+
+
+def stream_footfall_csv(data, chunksize=None):
+    chunksize = chunksize or STREAM_CHUNK_ROWS
+    header = pd.read_csv(BytesIO(data), nrows=0).columns
+    selected, missing_cols = resolve_header(header, footfall_column_map, required_footfall_cols)
+    if missing_cols:
+        return pd.DataFrame(columns=list(selected.values())), missing_cols
+
+    reader = pd.read_csv(BytesIO(data), usecols=list(selected), chunksize=chunksize)
+    partials = []
+    pending_rows = 0
+    total_rows = 0
+    for chunk in reader:
+        total_rows += len(chunk)
+        chunk = standardize_footfall(chunk.rename(columns=selected))
+        partial = fold_partials([chunk[AGGREGATE_KEYS + FOOTFALL_VALUE_COLS + ['Entry_Count']]])
+        partials.append(partial)
+        pending_rows += len(partial)
+        # Re-fold once the partials rival a chunk in size so memory tracks the aggregate
+        if pending_rows > chunksize and len(partials) > 1:
+            partials = [fold_partials(partials)]
+            pending_rows = len(partials[0])
+
+    if partials:
+        # Chunk categories differ, so keys are re-encoded once over the final aggregate
+        df = compact_keys(fold_partials(partials))
+        counts = df['Entry_Count'].to_numpy(dtype=np.int64)
+        for col in FOOTFALL_VALUE_COLS:
+            df[col] = downcast_counts(df[col] * counts)
+        df['Entry_Count'] = downcast_counts(df['Entry_Count'])
+    else:
+        df = pd.DataFrame(columns=AGGREGATE_KEYS + FOOTFALL_VALUE_COLS + ['Entry_Count'])
+
+    log_event("footfall_streamed", raw_rows=total_rows, aggregated_rows=len(df), chunk_rows=chunksize)
+    return df, []
+
+
+def upload_key(name, data, kind):
+    # Parse cache key and effective kind; large footfall CSVs are cached in aggregated form
+    if kind == 'footfall' and name.endswith(".csv") and len(data) >= STREAM_CSV_BYTES:
+        kind = 'footfall-agg'
+    return f"{kind}-v{NORMALIZE_VERSION}-{parse_cache.content_hash(data)}", kind
+
+
+def load_normalized(name, data, kind):
+    # Parse cache is keyed on the uploaded bytes, so reruns with the same file skip parsing
+    key, kind = upload_key(name, data, kind)
+    stream = kind == 'footfall-agg'
+    df = parse_cache.load(key)
+    if df is not None:
+        log_event("upload_loaded", kind=kind, cache_hit=True, rows=len(df), bytes=len(data))
+        return df, [], key
+
+    with profiling.stage(f"parse {kind}"):
+        if stream:
+            df, missing_cols = stream_footfall_csv(data)
+        elif kind == 'footfall':
+            df, missing_cols = read_normalized(name, data, footfall_column_map, required_footfall_cols, 'Footfall')
+        else:
+            df, missing_cols = read_normalized(name, data, master_column_map, required_master_cols, 'Master')
+
+    if not missing_cols:
+        parse_cache.store(key, df)
+    log_event("upload_loaded", kind=kind, cache_hit=False, rows=len(df), bytes=len(data), missing_cols=missing_cols)
+    return df, missing_cols, key
+
+
+def concat_footfall(frames):
+    # Key columns are unioned as categoricals (pd.concat would fall back to object when the
+    # categories differ), everything else is concatenated column by column
+    columns = {}
+    for col in AGGREGATE_KEYS + FOOTFALL_VALUE_COLS + ['Entry_Count']:
+        parts = [df[col] for df in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            try:
+                columns[col] = union_categoricals(parts, sort_categories=True, ignore_order=True)
+                continue
+            except TypeError:
+                # Categories of different types (e.g. numeric and text codes) are re-encoded
+                parts = [part.astype(object) for part in parts]
+                columns[col] = to_category(pd.concat(parts, ignore_index=True))
+                continue
+        columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def drop_overlapping_days(df, file_index, priority):
+    # A facility-day present in several files is kept only from the highest-priority file;
+    # entries without an Entry_Date cannot overlap and are always kept
+    days = df['Entry_Date'].dt.normalize()
+    groups = df[AGGREGATE_KEYS].assign(Entry_Date=days).groupby(
+        AGGREGATE_KEYS, dropna=False, sort=False, observed=True
+    ).ngroup().to_numpy()
+    row_priority = priority[file_index]
+    owner = np.full(groups.max() + 1 if len(groups) else 0, -1, dtype=np.int64)
+    np.maximum.at(owner, groups, row_priority)
+    keep = (row_priority == owner[groups]) | days.isna().to_numpy()
+    return df[keep].reset_index(drop=True), int((~keep).sum())
+
+
+def load_footfall_uploads(files):
+    # files is [(name, bytes), ...]; returns (df, missing_cols, key) like load_normalized
+    if len(files) == 1:
+        name, data = files[0]
+        return load_normalized(name, data, 'footfall')
+
+    keys = [upload_key(name, data, 'footfall')[0] for name, data in files]
+    key = f"footfall-multi-v{NORMALIZE_VERSION}-{hashlib.sha256('|'.join(keys).encode()).hexdigest()}"
+    df = parse_cache.load(key)
+    if df is not None:
+        log_event("uploads_merged", files=len(files), cache_hit=True, rows=len(df))
+        return df, [], key
+
+    futures = [
+        (_process_pool.get() if name.endswith('.xlsx') and INGEST_WORKERS > 1 else _executor).submit(
+            load_normalized, name, data, 'footfall'
+        )
+        for name, data in files
+    ]
+    results = [future.result() for future in futures]
+    missing_cols = []
+    for _, missing, _ in results:
+        missing_cols += [col for col in missing if col not in missing_cols]
+    if missing_cols:
+        return pd.DataFrame(), missing_cols, key
+
+    frames = [df for df, _, _ in results]
+    # Later exports win overlapping days: files are ranked by their last Entry_Date, then upload order
+    last_days = [frame['Entry_Date'].max() for frame in frames]
+    ranking = sorted(range(len(frames)), key=lambda i: (pd.Timestamp.min if pd.isna(last_days[i]) else last_days[i], i))
+    priority = np.empty(len(frames), dtype=np.int64)
+    priority[ranking] = np.arange(len(frames))
+    file_index = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+
+    df, dropped = drop_overlapping_days(concat_footfall(frames), file_index, priority)
+    parse_cache.store(key, df)
+    log_event("uploads_merged", files=len(files), cache_hit=False, rows=len(df), overlapping_rows_dropped=dropped)
+    return df, [], key
@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+
+# Least-recently-used memo behind the module-level caches (daily cubes, reporting bitmaps,
+# deduplicated frames, table views, summaries). Values are built outside the lock so a slow
+# build does not hold up lookups of other keys; two reruns racing on the same missing key
+# may both build it, and the later one is kept. A memo of large values can be bounded by
+# their total size instead (max_bytes, with weigh giving each value's size); the value just
+# built is always kept, even when it alone is over the bound.
+
+
+class LRUMemo:
+    def __init__(self, max_entries=None, max_bytes=None, weigh=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.weigh = weigh
+        self._values = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, build, *args):
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self._values.move_to_end(key)
+                return value
+        value = build(*args)
+        size = self.weigh(value) if self.weigh else 0
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            self._sizes[key] = size
+            while len(self._values) > 1 and self._over_bound():
+                evicted, _ = self._values.popitem(last=False)
+                del self._sizes[evicted]
+        return value
+
+    def _over_bound(self):
+        # Caller holds _lock
+        if self.max_entries is not None and len(self._values) > self.max_entries:
+            return True
+        return self.max_bytes is not None and sum(self._sizes.values()) > self.max_bytes
+
+    def __len__(self):
+        return len(self._values)
+
+    def nbytes(self):
+        with self._lock:
+            return sum(self._sizes.values())
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Normalized upload frames are spilled to disk as uncompressed Arrow IPC files so a
+# cache hit can be memory-mapped instead of re-parsed. Eviction is least-recently-used,
+# tracked through file mtimes, and bounded by total bytes on disk.
+CACHE_DIR = os.environ.get(
+    'UPHC_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.parse_cache')
+)
+CACHE_MAX_BYTES = int(os.environ.get('UPHC_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+_lock = threading.Lock()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.arrow")
+
+
+def load(key):
+    path = _path(key)
+    try:
+        table = feather.read_table(path, memory_map=True)
+    except (OSError, pa.ArrowException):
+        return None
+    try:
+        os.utime(path)  # Mark as most recently used
+    except OSError:
+        pass
+    return table.to_pandas()
+
+
+def store(key, df):
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError):
+        # Mixed-type object columns cannot be spilled; the caller just re-parses next time
+        return False
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, _path(key))
+    except (OSError, pa.ArrowException):
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    evict(keep=key)
+    return True
+
+
+def evict(keep=None, max_bytes=None):
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _lock:
+        try:
+            names = [name for name in os.listdir(CACHE_DIR) if name.endswith('.arrow')]
+        except FileNotFoundError:
+            return
+
+        entries = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(CACHE_DIR, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= max_bytes:
+                break
+            if keep is not None and name == f"{keep}.arrow":
+                continue
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def clear():
+    evict(max_bytes=0)
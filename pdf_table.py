@@ -0,0 +1,163 @@
+import re
+
+import numpy as np
+from fpdf import FPDF
+
+# Tabular PDF renderer for the summary reports. Cell text is converted and escaped one
+# column at a time, column widths come from the data, the wrapped header is redrawn by
+# header() on every page, and each row is emitted as a single content-stream write.
+BASE_FONT_SIZE = 8
+MIN_FONT_SIZE = 5
+HEADER_LINE_HEIGHT = 5
+ROW_HEIGHT = 10
+
+
+def _escape_column(values):
+    return (values.str.replace('\\', '\\\\', regex=False)
+                  .str.replace('(', '\\(', regex=False)
+                  .str.replace(')', '\\)', regex=False)
+                  .str.replace('\r', ' ', regex=False)
+                  .str.replace('\n', ' ', regex=False))
+
+
+def _header_lines(col):
+    # Wrap on spaces like before, and after underscores so long snake_case headers stay narrow
+    return [part for part in re.split(r' |(?<=_)', str(col)) if part]
+
+
+def _longest(values, count=5):
+    lengths = values.str.len().to_numpy()
+    if len(lengths) <= count:
+        return values.tolist()
+    return values.iloc[np.argpartition(lengths, -count)[-count:]].tolist()
+
+
+class _StreamBuffer:
+    # Stands in for FPDF's string buffer: document chunks are appended (or written straight
+    # to a sink) instead of re-concatenating the whole document on every line
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.chunks = []
+        self.length = 0
+
+    def __iadd__(self, s):
+        self.length += len(s)
+        if self.sink is None:
+            self.chunks.append(s)
+        else:
+            self.sink.write(s.encode('latin1'))
+        return self
+
+    def __len__(self):
+        return self.length
+
+    def getvalue(self):
+        return ''.join(self.chunks).encode('latin1')
+
+
+class TablePDF(FPDF):
+    def __init__(self, df, title, row_height=ROW_HEIGHT):
+        super().__init__(orientation="L", unit="mm", format="A4")
+        self.report_title = title
+        self.set_title(title)
+        self.row_height = row_height
+        self.set_font("Arial", size=BASE_FONT_SIZE)
+
+        frame = df.fillna(0)
+        self.columns = [str(col) for col in frame.columns]
+        text = {
+            col: frame[col].astype(str)
+                           .str.encode('latin-1', errors='replace')
+                           .str.decode('latin-1')
+            for col in frame.columns
+        }
+        self.headers = [_header_lines(col) for col in self.columns]
+        self.header_cache = {}
+        self._fit_columns(text)
+        self.cells = [_escape_column(values).tolist() for values in text.values()]
+
+    def _fit_columns(self, text):
+        # Natural widths at the base font size, then shrink the font if the table is too wide
+        pad = 2 * self.c_margin + 1
+        natural = []
+        for lines, values in zip(self.headers, text.values()):
+            samples = lines + _longest(values)
+            natural.append(max(self.get_string_width(s) for s in samples) + pad)
+
+        available = self.w - self.l_margin - self.r_margin
+        scale = available / sum(natural) if natural else 1.0
+        if scale >= 1:
+            # Spread spare room across the columns so the table spans the page
+            self.widths = [w * scale for w in natural]
+        else:
+            font_size = max(MIN_FONT_SIZE, BASE_FONT_SIZE * scale)
+            self.set_font("Arial", size=font_size)
+            self.widths = [(w - pad) * font_size / BASE_FONT_SIZE + pad for w in natural]
+
+        self.header_height = HEADER_LINE_HEIGHT * max((len(lines) for lines in self.headers), default=1)
+        self.x_offsets = np.concatenate(([0.0], np.cumsum(self.widths)[:-1])) + self.l_margin
+
+    def _header_ops(self, y):
+        # Filled, bordered header cells with each wrapped line centered, as one content write
+        k, h = self.k, self.h
+        # Fill colour also paints text in PDF, so the grey is scoped to the cell rectangles
+        ops = ["q 0.863 g"]
+        for x, w in zip(self.x_offsets, self.widths):
+            ops.append(f"{x * k:.2f} {(h - y) * k:.2f} {w * k:.2f} {-self.header_height * k:.2f} re B")
+        ops.append("Q")
+        for x, w, lines in zip(self.x_offsets, self.widths, self.headers):
+            top = y + (self.header_height - HEADER_LINE_HEIGHT * len(lines)) / 2
+            for i, line in enumerate(lines):
+                tx = x + (w - self.get_string_width(line)) / 2
+                ty = h - (top + (i + 0.5) * HEADER_LINE_HEIGHT + 0.3 * self.font_size)
+                ops.append(f"BT {tx * k:.2f} {ty * k:.2f} Td ({self._escape(line)}) Tj ET")
+        return " ".join(ops)
+
+    def header(self):
+        if self.page == 1:
+            self.cell(0, 10, self.report_title, ln=1, align='C')
+        y = self.get_y()
+        if y not in self.header_cache:
+            self.header_cache[y] = self._header_ops(y)
+        self._out(self.header_cache[y])
+        self.set_xy(self.l_margin, y + self.header_height)
+
+    def render(self, progress=None, sink=None):
+        self.buffer = _StreamBuffer(sink)
+        self.add_page()
+        k, h, row_height = self.k, self.h, self.row_height
+        text_dy = 0.5 * row_height + 0.3 * self.font_size
+        # Per-column x positions are fixed, so only the two y coordinates vary per row
+        lead = [f"{x * k:.2f} " for x in self.x_offsets]
+        mid = [
+            f" {w * k:.2f} {-row_height * k:.2f} re S BT {(x + self.c_margin) * k:.2f} "
+            for x, w in zip(self.x_offsets, self.widths)
+        ]
+        columns = list(zip(lead, mid))
+
+        rows = list(zip(*self.cells))
+        total_rows = max(len(rows), 1)
+        current_page = self.page
+        for row_number, row in enumerate(rows, start=1):
+            if self.y + row_height > self.page_break_trigger:
+                self.add_page()
+            y = f"{(h - self.y) * k:.2f}"
+            ty = f"{(h - (self.y + text_dy)) * k:.2f} Td ("
+            self._out(" ".join(
+                a + y + b + ty + value + ") Tj ET"
+                for (a, b), value in zip(columns, row)
+            ))
+            self.y += row_height
+            if progress and self.page != current_page:
+                current_page = self.page
+                progress(row_number / total_rows)
+        self.close()
+        return None if sink is not None else self.buffer.getvalue()
+
+
+def render_table_pdf(df, title, progress=None, row_height=ROW_HEIGHT, sink=None):
+    # With a binary file-like sink the document is written out as it is assembled
+    data = TablePDF(df, title, row_height=row_height).render(progress=progress, sink=sink)
+    if progress:
+        progress(1.0)
+    return data
@@ -0,0 +1,386 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import ingest
+import reconcile
+from debug_log import debug_enabled, log_debug
+from memo import LRUMemo
+from pdf_table import render_table_pdf
+from xlsx_table import write_workbook
+
+# Report pipeline shared by the Streamlit app and the batch CLI: per-facility totals for a
+# date range (from the daily cube), dashboard counts, the facility-wise and district-wise
+# summaries of every AAM type (memoized per inputs and date range), period-over-period
+# comparisons of those summaries, and the Excel/PDF writers.
+AAM_TYPES = ['AAM-USHC', 'AAM-UPHC']
+MAX_MEMO = int(os.environ.get('UPHC_SUMMARY_MEMO_SIZE', 16))
+
+# Period kind -> label shown in the app; every kind lays its periods back to back, ending on the To Date
+COMPARE_PERIODS = {
+    'month': "Calendar months",
+    'week': "Weeks",
+    'range': "Periods as long as the selected range",
+}
+MAX_PERIODS = 12
+FACILITY_COMPARE = ['Footfall_Total', 'Footfall_Female']
+
+REPORT_FILES = {
+    'facility-xlsx': "FacilityWiseReport.xlsx",
+    'facility-pdf': "FacilityWiseReport.pdf",
+    'district-xlsx': "DistrictWiseReport.xlsx",
+    'district-pdf': "DistrictWiseReport.pdf",
+    'combined-xlsx': "Combined_Footfall_Report.xlsx",
+}
+
+_memo = LRUMemo(MAX_MEMO)
+
+
+def to_excel(df, progress=None):
+    return write_workbook({'Sheet1': df}, progress=progress)
+
+
+def create_pdf(df, title, progress=None):
+    return render_table_pdf(df, title, progress=progress)
+
+
+def to_combined_excel(facility_df, district_df, total_registered, total_reported, progress=None):
+    # Debug: Log dictionaries before creating combined_summary
+    log_debug("combined_excel_totals", total_registered=total_registered, total_reported=total_reported)
+
+    combined_summary = pd.DataFrame({
+        'Metric': ['Total Facilities (AAM-UPHC)', 'Total Facilities (AAM-USHC)', 'Reported Facilities (AAM-UPHC)', 'Reported Facilities (AAM-USHC)'],
+        'Value': [
+            total_registered.get('AAM-UPHC', 0),
+            total_registered.get('AAM-USHC', 0),
+            total_reported.get('AAM-UPHC', 0),
+            total_reported.get('AAM-USHC', 0)
+        ]
+    })
+    return write_workbook({
+        'Facility-wise Summary': facility_df,
+        'District-wise Summary': district_df,
+        'Dashboard Summary': combined_summary
+    }, progress=progress)
+
+
+def to_reconciliation_excel(facilities, district_lists, unmatched, progress=None):
+    return write_workbook({
+        'District-wise Lists': district_lists,
+        'Facility Matches': facilities,
+        'Unmatched Footfall': unmatched
+    }, progress=progress)
+
+
+def to_compliance_excel(district_compliance, daily_compliance, facility_days, progress=None):
+    return write_workbook({
+        'District Compliance': district_compliance,
+        'Daily Compliance': daily_compliance,
+        'Facility Reporting Days': facility_days
+    }, progress=progress)
+
+
+def to_comparison_excel(facility_comparison, district_comparison, progress=None):
+    return write_workbook({
+        'Facility-wise Comparison': facility_comparison,
+        'District-wise Comparison': district_comparison
+    }, progress=progress)
+
+
+def range_totals(cube, start_date, end_date):
+    if start_date and end_date and start_date <= end_date:
+        return cube.range_totals(start_date, end_date)
+    return cube.range_totals()
+
+
+def dashboard_totals(master_df, facility_totals):
+    # Count all Facility_Name entries, including duplicates
+    total_registered = master_df.groupby('AAM_Type', observed=True)['Facility_Name'].count().to_dict()
+    # Entry_Count carries the raw entries behind each row, which is more than one for aggregated frames
+    total_reported = facility_totals.dropna(subset=['Facility_Name']).groupby('AAM_Type', observed=True)['Entry_Count'].sum().to_dict()
+    return total_registered, total_reported
+
+
+def facility_summary_for(facility_rows):
+    # Facility-wise Summary (date-filtered, includes all Facility_Name entries); facility_rows
+    # is one AAM type's slice of the per-facility sums, already in display order
+    facility_summary = facility_rows[['District_Name', 'Facility_Name', 'AAM_Type', 'Footfall_Total', 'Footfall_Female']].reset_index(drop=True)
+    facility_summary['% Female Footfall'] = round((facility_summary['Footfall_Female'] / facility_summary['Footfall_Total'].replace(0, 1)) * 100, 2)
+    facility_summary.insert(0, 'S.No.', range(1, len(facility_summary) + 1))
+
+    total_footfall = facility_summary['Footfall_Total'].sum()
+    total_female = facility_summary['Footfall_Female'].sum()
+    total_percent_female = round((total_female / total_footfall) * 100, 2) if total_footfall != 0 else 0
+    total_row = {
+        'S.No.': '',
+        'District_Name': 'Total',
+        'Facility_Name': '',
+        'AAM_Type': '',
+        'Footfall_Total': total_footfall,
+        'Footfall_Female': total_female,
+        '% Female Footfall': total_percent_female
+    }
+    return pd.concat([facility_summary, pd.DataFrame([total_row])], ignore_index=True)
+
+
+def district_summary_for(registered, reported):
+    # District-wise Summary (date-filtered, count all Facility_Name entries); registered and
+    # reported are one AAM type's per-district master counts and footfall sums
+    total_registered_summary = registered.reset_index(name='Registered_Facilities')
+    totals = reported.rename(columns={'Entry_Count': 'Reported_Facilities', 'Footfall_Total': 'Total_Footfall'}).reset_index()
+
+    district_summary = total_registered_summary.merge(totals[['District_Name', 'Reported_Facilities']], on='District_Name', how='left') \
+                                              .merge(totals[['District_Name', 'Total_Footfall']], on='District_Name', how='left')
+
+    district_summary['Reported_Facilities'] = district_summary['Reported_Facilities'].fillna(0).astype(int)
+    district_summary['Unreported_Facilities'] = district_summary['Registered_Facilities'] - district_summary['Reported_Facilities']
+    district_summary['Avg_Footfall_Per_Facility'] = round(district_summary['Total_Footfall'] / district_summary['Reported_Facilities'].replace(0, 1), 2)
+    district_summary['%_Reported'] = round((district_summary['Reported_Facilities'] / district_summary['Registered_Facilities']) * 100, 2)
+    district_summary.insert(0, 'S.No.', range(1, len(district_summary) + 1))
+
+    district_summary = district_summary[
+        ['S.No.', 'District_Name', 'Registered_Facilities', 'Reported_Facilities', 'Unreported_Facilities',
+         'Total_Footfall', 'Avg_Footfall_Per_Facility', '%_Reported']
+    ]
+
+    sum_row = {
+        'S.No.': '',
+        'District_Name': 'Total',
+        'Registered_Facilities': district_summary['Registered_Facilities'].sum(),
+        'Reported_Facilities': district_summary['Reported_Facilities'].sum(),
+        'Unreported_Facilities': district_summary['Unreported_Facilities'].sum(),
+        'Total_Footfall': district_summary['Total_Footfall'].sum(),
+        'Avg_Footfall_Per_Facility': round(district_summary['Total_Footfall'].sum() / district_summary['Reported_Facilities'].sum(), 2) if district_summary['Reported_Facilities'].sum() != 0 else 0,
+        '%_Reported': round((district_summary['Reported_Facilities'].sum() / district_summary['Registered_Facilities'].sum()) * 100, 2) if district_summary['Registered_Facilities'].sum() != 0 else 0
+    }
+    return pd.concat([district_summary, pd.DataFrame([sum_row])], ignore_index=True)
+
+
+def summaries_by_type(facility_totals, master_df, aam_types=AAM_TYPES):
+    # Facility-wise and district-wise summaries of every AAM type from one grouped pass over
+    # each input: {aam_type: (facility_summary, district_summary)}
+    footfall_df_filtered = ingest.fillna_zero(facility_totals[facility_totals['AAM_Type'].isin(aam_types)])
+    master_df_filtered = ingest.fillna_zero(master_df[master_df['AAM_Type'].isin(aam_types)])
+
+    facility_rows = footfall_df_filtered.groupby(
+        ['District_Name', 'Facility_Name', 'AAM_Type'], as_index=False, observed=True
+    )[['Footfall_Total', 'Footfall_Female', 'Entry_Count']].sum()
+    registered = master_df_filtered.groupby(['AAM_Type', 'District_Name'], observed=True)['Facility_Name'].count()
+    reported = facility_rows.groupby(['AAM_Type', 'District_Name'], observed=True)[['Entry_Count', 'Footfall_Total']].sum()
+
+    if debug_enabled():
+        log_debug(
+            "footfall_aam_split",
+            aam_types=list(aam_types),
+            facility_rows=facility_rows['AAM_Type'].value_counts().to_dict()
+        )
+
+    summaries = {}
+    for aam_type in aam_types:
+        summaries[aam_type] = (
+            facility_summary_for(facility_rows[facility_rows['AAM_Type'] == aam_type]),
+            district_summary_for(_type_slice(registered, aam_type), _type_slice(reported, aam_type))
+        )
+    return summaries
+
+
+def _type_slice(grouped, aam_type):
+    # One AAM type's rows of a frame grouped by (AAM_Type, District_Name), indexed by district
+    if aam_type in grouped.index.get_level_values('AAM_Type'):
+        return grouped.xs(aam_type, level='AAM_Type')
+    return grouped.iloc[:0].droplevel('AAM_Type')
+
+
+def build_summaries(facility_totals, master_df, aam_type):
+    return summaries_by_type(facility_totals, master_df, [aam_type.upper()])[aam_type.upper()]
+
+
+def build_reconciliation(facility_totals, master_df, aam_type):
+    # Registered facilities of one AAM type matched against those that reported in the range
+    facilities, unmatched = reconcile.reconcile(
+        master_df[master_df['AAM_Type'] == aam_type.upper()],
+        facility_totals[facility_totals['AAM_Type'] == aam_type.upper()]
+    )
+    log_debug("reconciliation_built", aam_type=aam_type, facilities=len(facilities),
+              fuzzy=int((facilities['Match'] == 'fuzzy').sum()), unmatched=len(unmatched))
+    return facilities, reconcile.district_lists(facilities), unmatched
+
+
+def build_compliance(bitmap, master_df, aam_type, start_date, end_date):
+    # Reporting compliance of one AAM type from the facility x day bitmap: days reported and
+    # longest missing streak per facility, % of registered facilities reporting per district
+    # and day, and a per-district summary of those daily rates
+    if not (start_date and end_date and start_date <= end_date):
+        start_date = end_date = None
+    aam_type = aam_type.upper()
+    registered = master_df[master_df['AAM_Type'] == aam_type].groupby('District_Name', observed=True).size()
+
+    facility_days = bitmap.facility_stats(start_date, end_date, aam_type)
+    facility_days.insert(0, 'S.No.', range(1, len(facility_days) + 1))
+    daily = bitmap.district_daily(start_date, end_date, aam_type, registered)
+
+    reporting = facility_days[facility_days['Days_Reported'] > 0].groupby('District_Name', observed=True).size()
+    district_compliance = pd.DataFrame({'District_Name': daily.columns})
+    district_compliance['Registered_Facilities'] = registered.reindex(daily.columns).fillna(0).astype(int).to_numpy()
+    district_compliance['Facilities_Reporting'] = reporting.reindex(daily.columns).fillna(0).astype(int).to_numpy()
+    district_compliance['Avg_Daily_Compliance_%'] = daily.mean().round(2).to_numpy()
+    district_compliance['Lowest_Daily_Compliance_%'] = daily.min().to_numpy()
+    district_compliance = district_compliance.sort_values('District_Name', kind='stable', key=lambda names: names.astype(str)).reset_index(drop=True)
+    district_compliance.insert(0, 'S.No.', range(1, len(district_compliance) + 1))
+
+    log_debug("compliance_built", aam_type=aam_type, facilities=len(facility_days), days=len(daily), bitmap_bytes=bitmap.nbytes)
+    return facility_days, district_compliance, daily.reset_index()
+
+
+def period_edges(kind, count, start_date, end_date):
+    # count consecutive periods ending on end_date, oldest first: count + 1 day boundaries
+    # (period k is [edges[k], edges[k + 1])) and a label per period. A calendar month that
+    # end_date cuts short is labelled with the day it stops at.
+    end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+    if kind == 'month':
+        months = pd.period_range(end=pd.Period(end_date, freq='M'), periods=count, freq='M')
+        edges = pd.DatetimeIndex([month.start_time for month in months] + [end])
+        labels = [month.strftime('%b %Y') for month in months]
+        if end <= months[-1].end_time:
+            labels[-1] += f" (to {pd.Timestamp(end_date):%d})"
+        return edges, labels
+    if kind == 'week':
+        length = pd.Timedelta(days=7)
+    elif kind == 'range':
+        length = end - pd.Timestamp(start_date).normalize()
+    else:
+        raise ValueError(f"Unknown comparison period: {kind}")
+    edges = pd.DatetimeIndex([end - length * k for k in range(count, -1, -1)])
+    one_day = pd.Timedelta(days=1)
+    labels = [
+        f"{first:%Y-%m-%d}" if length == one_day else f"{first:%Y-%m-%d}–{last - one_day:%Y-%m-%d}"
+        for first, last in zip(edges[:-1], edges[1:])
+    ]
+    return edges, labels
+
+
+def _side_by_side(metrics, labels, rates=()):
+    # metrics: {name: frame with one column per period}. Per period, each metric, then (from
+    # the second period on) its change from the previous period and that change in percent;
+    # a change from zero has no percentage and is left missing (0 once displayed). Rates
+    # (already percentages) only get the change, in points.
+    columns = {}
+    for k, label in enumerate(labels):
+        for name, values in metrics.items():
+            columns[f"{name} | {label}"] = values[k]
+        if k:
+            for name, values in metrics.items():
+                delta = values[k] - values[k - 1]
+                columns[f"Δ {name} | {label}"] = delta
+                if name in rates:
+                    continue
+                columns[f"% Change {name} | {label}"] = round(delta / values[k - 1].replace(0, np.nan) * 100, 2)
+    return pd.DataFrame(columns)
+
+
+def _with_total(values):
+    # Appends the column sums (or the sum of a series) as one more row, labelled 'Total'
+    if isinstance(values, pd.Series):
+        return pd.concat([values, pd.Series([values.sum()], index=['Total'])])
+    return pd.concat([values, values.sum().to_frame('Total').T])
+
+
+def comparisons_by_type(period_totals, master_df, labels, aam_types=AAM_TYPES):
+    # Facility-wise and district-wise summaries of every period side by side, from one
+    # groupby over the per-facility period totals: {aam_type: (facility, district)}
+    periods = range(len(labels))
+    measures = ['Footfall_Total', 'Footfall_Female', 'Entry_Count']
+    period_totals = ingest.fillna_zero(period_totals[period_totals['AAM_Type'].isin(aam_types)])
+    master_df_filtered = ingest.fillna_zero(master_df[master_df['AAM_Type'].isin(aam_types)])
+
+    grouped = period_totals.groupby(['AAM_Type', 'District_Name', 'Facility_Name', 'Period'], observed=True)[measures].sum()
+    wide = grouped.unstack('Period', fill_value=0).reindex(
+        columns=pd.MultiIndex.from_product([measures, periods]), fill_value=0
+    )
+    registered = master_df_filtered.groupby(['AAM_Type', 'District_Name'], observed=True)['Facility_Name'].count()
+
+    comparisons = {}
+    for aam_type in aam_types:
+        facilities = _type_slice(wide, aam_type)
+        names = facilities.index.to_frame(index=False).astype(object)
+        names['AAM_Type'] = aam_type
+        names.loc[len(names)] = ['Total', '', '']
+        facility_comparison = pd.concat([
+            names,
+            _side_by_side({name: _with_total(facilities[name]).reset_index(drop=True) for name in FACILITY_COMPARE}, labels)
+        ], axis=1)
+        facility_comparison.insert(0, 'S.No.', list(range(1, len(names))) + [''])
+
+        # District rows follow the master, as in the district-wise summary
+        district_registered = _type_slice(registered, aam_type)
+        district_registered.index = district_registered.index.astype(object)
+        districts = facilities.groupby(level='District_Name', observed=True).sum()
+        districts.index = districts.index.astype(object)
+        districts = _with_total(districts.reindex(district_registered.index, fill_value=0)).reset_index(drop=True)
+        district_registered = _with_total(district_registered)
+        reported = districts['Entry_Count']
+        district_comparison = pd.concat([
+            pd.DataFrame({'District_Name': district_registered.index, 'Registered_Facilities': district_registered.to_numpy()}),
+            _side_by_side({
+                'Reported_Facilities': reported,
+                'Total_Footfall': districts['Footfall_Total'],
+                '%_Reported': round(reported.div(district_registered.replace(0, np.nan).to_numpy(), axis=0) * 100, 2),
+            }, labels, rates=['%_Reported'])
+        ], axis=1)
+        district_comparison.insert(0, 'S.No.', list(range(1, len(district_comparison))) + [''])
+        comparisons[aam_type] = (facility_comparison, district_comparison)
+    return comparisons
+
+
+def build_comparisons(source, master_df, kind, count, start_date, end_date):
+    # Returns (labels, {aam_type: (facility_comparison, district_comparison)})
+    edges, labels = period_edges(kind, count, start_date, end_date)
+    comparisons = comparisons_by_type(source.period_totals(edges), master_df, labels)
+    log_debug("comparisons_built", kind=kind, periods=labels)
+    return labels, comparisons
+
+
+def get_summaries(key, facility_totals, master_df):
+    # Summaries of every AAM type memoized per (inputs, date range), so switching the AAM
+    # type or returning to an earlier range is a lookup
+    return _memo.get(('summaries', key), summaries_by_type, facility_totals, master_df)
+
+
+def get_reconciliation(key, facility_totals, master_df, aam_type):
+    return _memo.get(('reconciliation', key, aam_type), build_reconciliation, facility_totals, master_df, aam_type)
+
+
+def get_compliance(key, bitmap, master_df, aam_type, start_date, end_date):
+    return _memo.get(('compliance', key, aam_type), build_compliance, bitmap, master_df, aam_type, start_date, end_date)
+
+
+def get_comparisons(key, source, master_df, kind, count, start_date, end_date):
+    # key is the inputs' key; periods are fixed by kind, count and the selected range
+    memo_key = ('comparisons', key, kind, count, str(start_date), str(end_date))
+    return _memo.get(memo_key, build_comparisons, source, master_df, kind, count, start_date, end_date)
+
+
+def build_report(kind, facility_summary, district_summary, total_registered, total_reported, progress=None):
+    if kind == 'facility-xlsx':
+        return to_excel(facility_summary, progress=progress)
+    if kind == 'facility-pdf':
+        return create_pdf(facility_summary, "Facility-wise Summary Report", progress=progress)
+    if kind == 'district-xlsx':
+        return to_excel(district_summary, progress=progress)
+    if kind == 'district-pdf':
+        return create_pdf(district_summary, "District-wise Summary Report", progress=progress)
+    if kind == 'combined-xlsx':
+        return to_combined_excel(facility_summary, district_summary, total_registered, total_reported, progress=progress)
+    raise ValueError(f"Unknown report kind: {kind}")
+
+
+def write_reports(out_dir, kinds, facility_summary, district_summary, total_registered, total_reported):
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for kind in kinds:
+        path = os.path.join(out_dir, REPORT_FILES[kind])
+        with open(path, 'wb') as f:
+            f.write(build_report(kind, facility_summary, district_summary, total_registered, total_reported))
+        paths.append(path)
+    return paths
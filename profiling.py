@@ -0,0 +1,205 @@
+import json
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from debug_log import log_event
+
+# Opt-in per-stage profiling of app reruns (?profile=1, or UPHC_PROFILE=1 for every rerun).
+# Each stage records wall time, CPU time of the running thread and the tracemalloc peak
+# above the memory in use when the stage started. Stages may nest; a parent's peak covers
+# its children, and a stage entered several times in one rerun (per CSV chunk, say) is one
+# entry with its calls summed and the highest peak. tracemalloc runs only while a profiled
+# rerun is in progress, and its peak is process-wide, so reruns profiled concurrently see
+# each other's allocations. A rerun that Streamlit interrupts never finishes; the session
+# releases it on its next rerun, and any run still open after STALE_RUN_SEC (its session
+# may have closed) is released by age, so tracemalloc does not stay on for the process.
+# Finished runs are kept in a bounded, process-wide history that can be exported as JSON.
+PROFILE_PARAM = 'profile'
+PROFILE_ALWAYS = os.environ.get('UPHC_PROFILE', '') == '1'
+MAX_RUNS = int(os.environ.get('UPHC_PROFILE_HISTORY', 500))
+STALE_RUN_SEC = float(os.environ.get('UPHC_PROFILE_STALE_SEC', 600))
+
+_runs = deque(maxlen=MAX_RUNS)
+_lock = threading.Lock()
+_tracing = 0
+_active = set()
+_local = threading.local()
+
+
+def requested(query_params):
+    return PROFILE_ALWAYS or query_params.get(PROFILE_PARAM) in ('1', 'true', 'yes')
+
+
+class Run:
+    def __init__(self):
+        self.started = datetime.now(timezone.utc)
+        self.stages = []
+        self._entries = {}
+        self._stack = []
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.thread_time()
+        self.wall_sec = self.cpu_sec = None
+        self.active = True
+
+    @contextmanager
+    def stage(self, name):
+        if self._stack:
+            # The parent's peak so far is kept before the counter is reset for this stage
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        frame = {'name': ' > '.join([f['name'] for f in self._stack] + [name]), 'peak': 0}
+        self._stack.append(frame)
+        entry = self._entries.get(frame['name'])
+        if entry is None:
+            # Listed in start order, so a parent comes before its children
+            entry = {'stage': frame['name'], 'calls': 0, 'wall_sec': 0.0, 'cpu_sec': 0.0, 'peak_bytes': 0}
+            self._entries[frame['name']] = entry
+            self.stages.append(entry)
+        start_wall, start_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - start_wall, time.thread_time() - start_cpu
+            self._stack.pop()
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            entry['calls'] += 1
+            entry['wall_sec'] = round(entry['wall_sec'] + wall, 6)
+            entry['cpu_sec'] = round(entry['cpu_sec'] + cpu, 6)
+            entry['peak_bytes'] = max(entry['peak_bytes'], peak - current)
+
+    def record(self, **context):
+        return {
+            'ts': self.started.isoformat(timespec='milliseconds'),
+            'wall_sec': self.wall_sec,
+            'cpu_sec': self.cpu_sec,
+            'context': context,
+            'stages': self.stages,
+        }
+
+
+def _release(run):
+    # Caller holds _lock
+    global _tracing
+    run.active = False
+    _active.discard(run)
+    _tracing -= 1
+    if _tracing == 0:
+        tracemalloc.stop()
+
+
+def _release_stale():
+    # Caller holds _lock. A session closed mid-rerun never releases its run itself.
+    now = time.perf_counter()
+    for run in [run for run in _active if now - run._start_wall > STALE_RUN_SEC]:
+        _release(run)
+
+
+def release(run):
+    # For a run that was interrupted before finish_run; finished runs and None are ignored
+    if run is None:
+        return
+    with _lock:
+        if run.active:
+            _release(run)
+
+
+def start_run():
+    global _tracing
+    with _lock:
+        _release_stale()
+        if _tracing == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing += 1
+        run = Run()
+        _active.add(run)
+    _local.run = run
+    return run
+
+
+def finish_run(run, **context):
+    # context: anything that helps compare runs later (row counts, AAM type, date range)
+    run.wall_sec = round(time.perf_counter() - run._start_wall, 6)
+    run.cpu_sec = round(time.thread_time() - run._start_cpu, 6)
+    _local.run = None
+    with _lock:
+        if run.active:
+            _release(run)
+        record = run.record(**context)
+        _runs.append(record)
+    log_event("profile_run", wall_sec=run.wall_sec, cpu_sec=run.cpu_sec,
+              stages={s['stage']: s['wall_sec'] for s in run.stages})
+    return record
+
+
+@contextmanager
+def stage(name):
+    # No-op unless a profiled run is active on this thread, so callers need no checks
+    run = getattr(_local, 'run', None)
+    if run is None:
+        yield
+        return
+    with run.stage(name):
+        yield
+
+
+def timed(builder, name):
+    # Background builds (exports) run on other threads; they are recorded as their own
+    # entries with wall and CPU time only, since the tracemalloc peak there is not theirs
+    def build(*args, **kwargs):
+        started = datetime.now(timezone.utc)
+        start_wall, start_cpu = time.perf_counter(), time.thread_time()
+        result = builder(*args, **kwargs)
+        with _lock:
+            _runs.append({
+                'ts': started.isoformat(timespec='milliseconds'),
+                'wall_sec': round(time.perf_counter() - start_wall, 6),
+                'cpu_sec': round(time.thread_time() - start_cpu, 6),
+                'context': {'export': name},
+                'stages': [],
+            })
+        return result
+    return build
+
+
+def stage_frame(run):
+    # The run's stages in the order they started, for display
+    frame = pd.DataFrame(run.stages, columns=['stage', 'calls', 'wall_sec', 'cpu_sec', 'peak_bytes'])
+    return pd.DataFrame({
+        'Stage': frame['stage'],
+        'Calls': frame['calls'],
+        'Wall (ms)': (frame['wall_sec'] * 1000).round(1),
+        'CPU (ms)': (frame['cpu_sec'] * 1000).round(1),
+        'Peak (MB)': (frame['peak_bytes'] / 2 ** 20).round(2),
+    })
+
+
+def history():
+    with _lock:
+        _release_stale()
+        return list(_runs)
+
+
+def history_json():
+    return json.dumps({
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'exported_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'runs': history(),
+    }, indent=1, default=str)
+
+
+def clear():
+    with _lock:
+        _runs.clear()
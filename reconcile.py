@@ -0,0 +1,181 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+import ingest
+
+# Reconciles the facility master with the facilities that reported footfall, so each
+# registered facility is marked reported or not. Names are normalized once per distinct
+# value and hash-joined within their district; the leftovers on both sides then go through
+# a fuzzy pass whose candidate pairs come from a character-trigram blocking index, so only
+# names that share uncommon trigrams are ever compared.
+NGRAM = 3
+# Dice similarity of the trigram sets needed to accept a fuzzy match
+FUZZY_THRESHOLD = 0.75
+# Trigrams found in more leftover master names than this (per district) are too common
+# to block on, e.g. the "UPH"/"SHC" every facility name carries
+MAX_BLOCK_SIZE = 50
+# Candidates scored per unmatched footfall name, best-sharing first
+MAX_CANDIDATES = 5
+
+_NON_ALNUM = re.compile(r'[^0-9A-Z]+')
+_DIGITS = re.compile(r'[0-9]+')
+
+
+def match_key(name):
+    # Case, punctuation and spacing differences do not make two names different; dots are
+    # dropped rather than spaced so "U.P.H.C." and "UPHC" agree
+    if not isinstance(name, str):
+        return np.nan
+    key = _NON_ALNUM.sub(' ', name.upper().replace('.', '')).strip()
+    return key or np.nan
+
+
+def _trigrams(key):
+    padded = f" {key} "
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def _numbers(key):
+    # "UPHC WARD 12" and "UPHC WARD 13" are different facilities however similar they look
+    return tuple(int(run) for run in _DIGITS.findall(key))
+
+
+def _dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def _gram_pairs(ids, districts, grams):
+    # One row per (name id, district, trigram) for the blocking join
+    counts = [len(g) for g in grams]
+    return pd.DataFrame({
+        'id': np.repeat(ids, counts),
+        'District_Name': np.repeat(districts, counts),
+        'gram': [gram for g in grams for gram in g],
+    })
+
+
+def fuzzy_pairs(left, right, threshold=FUZZY_THRESHOLD):
+    # left/right: frames with District_Name and Name_Key, one row per distinct name.
+    # Returns (left position, right position, score) one-to-one pairs above the threshold.
+    if left.empty or right.empty:
+        return []
+    left_grams = [_trigrams(key) for key in left['Name_Key']]
+    right_grams = [_trigrams(key) for key in right['Name_Key']]
+    left_numbers = [_numbers(key) for key in left['Name_Key']]
+    right_numbers = [_numbers(key) for key in right['Name_Key']]
+    a = _gram_pairs(np.arange(len(left)), left['District_Name'].to_numpy(dtype=object), left_grams)
+    b = _gram_pairs(np.arange(len(right)), right['District_Name'].to_numpy(dtype=object), right_grams)
+
+    block_size = b.groupby(['District_Name', 'gram'], dropna=False)['id'].transform('size')
+    b = b[block_size <= MAX_BLOCK_SIZE]
+    candidates = a.merge(b, on=['District_Name', 'gram'], suffixes=('_left', '_right'))
+    if candidates.empty:
+        return []
+    shared = candidates.groupby(['id_left', 'id_right']).size().rename('shared').reset_index()
+    shared = shared.sort_values(['id_left', 'shared'], ascending=[True, False])
+    shared = shared[shared.groupby('id_left').cumcount() < MAX_CANDIDATES]
+
+    scored = [
+        (score, i, j)
+        for i, j in zip(shared['id_left'].tolist(), shared['id_right'].tolist())
+        if left_numbers[i] == right_numbers[j] and (score := _dice(left_grams[i], right_grams[j])) >= threshold
+    ]
+    # Greedy one-to-one assignment, best scores first
+    pairs, used_left, used_right = [], set(), set()
+    for score, i, j in sorted(scored, reverse=True):
+        if i not in used_left and j not in used_right:
+            used_left.add(i)
+            used_right.add(j)
+            pairs.append((i, j, round(score, 3)))
+    return pairs
+
+
+def reconcile(master_df, facility_totals, threshold=FUZZY_THRESHOLD):
+    # Returns (facilities, unmatched): every master row with how it matched the reported
+    # facilities, and the reported facilities no master row matched
+    reported = facility_totals[facility_totals['Entry_Count'] > 0]
+    reported = pd.DataFrame({
+        'District_Name': reported['District_Name'].astype(object),
+        'Name_Key': np.asarray(ingest.to_category(reported['Facility_Name'], match_key), dtype=object),
+        'Reported_Name': reported['Facility_Name'].astype(object),
+        'Footfall_Total': reported['Footfall_Total'],
+        'Entry_Count': reported['Entry_Count'],
+    }).dropna(subset=['Name_Key'])
+    # The same facility can report under several AAM types; it is matched once
+    reported = reported.groupby(['District_Name', 'Name_Key'], as_index=False, dropna=False, sort=False).agg(
+        Reported_Name=('Reported_Name', 'first'), Footfall_Total=('Footfall_Total', 'sum'), Entry_Count=('Entry_Count', 'sum')
+    )
+    # An all-blank District_Name comes out of the groupby as float64, which cannot be merged
+    # with the master's object column
+    reported['District_Name'] = reported['District_Name'].astype(object)
+
+    facilities = master_df[['District_Name', 'Facility_Name', 'AAM_Type']].astype(object).reset_index(drop=True)
+    facilities['Name_Key'] = np.asarray(ingest.to_category(facilities['Facility_Name'], match_key), dtype=object)
+    # Exact pass: hash join on (district, normalized name)
+    facilities = facilities.merge(reported, on=['District_Name', 'Name_Key'], how='left')
+    facilities['Match'] = np.where(facilities['Reported_Name'].notna(), 'exact', '')
+    facilities['Score'] = np.where(facilities['Reported_Name'].notna(), 1.0, np.nan)
+
+    # Fuzzy pass over distinct leftover names on both sides
+    used = facilities.loc[facilities['Match'] == 'exact', ['District_Name', 'Name_Key']].drop_duplicates()
+    left = reported.merge(used, on=['District_Name', 'Name_Key'], how='left', indicator=True)
+    left = left[left['_merge'] == 'left_only'].drop(columns='_merge').reset_index(drop=True)
+    right = facilities.loc[
+        (facilities['Match'] == '') & facilities['Name_Key'].notna(), ['District_Name', 'Name_Key']
+    ].drop_duplicates().reset_index(drop=True)
+    left['District_Name'] = left['District_Name'].astype(object)
+    right['District_Name'] = right['District_Name'].astype(object)
+    pairs = fuzzy_pairs(left, right, threshold)
+
+    if pairs:
+        i, j, scores = (list(col) for col in zip(*pairs))
+        fuzzy = right.iloc[j].reset_index(drop=True).assign(
+            Fuzzy_Name=left['Reported_Name'].iloc[i].to_numpy(),
+            Fuzzy_Footfall=left['Footfall_Total'].iloc[i].to_numpy(),
+            Fuzzy_Entries=left['Entry_Count'].iloc[i].to_numpy(),
+            Fuzzy_Score=scores,
+        )
+        facilities = facilities.merge(fuzzy, on=['District_Name', 'Name_Key'], how='left')
+        hit = facilities['Fuzzy_Name'].notna() & (facilities['Match'] == '')
+        facilities.loc[hit, 'Reported_Name'] = facilities.loc[hit, 'Fuzzy_Name']
+        facilities.loc[hit, 'Footfall_Total'] = facilities.loc[hit, 'Fuzzy_Footfall']
+        facilities.loc[hit, 'Entry_Count'] = facilities.loc[hit, 'Fuzzy_Entries']
+        facilities.loc[hit, 'Score'] = facilities.loc[hit, 'Fuzzy_Score']
+        facilities.loc[hit, 'Match'] = 'fuzzy'
+        facilities = facilities.drop(columns=['Fuzzy_Name', 'Fuzzy_Footfall', 'Fuzzy_Entries', 'Fuzzy_Score'])
+        left = left.drop(index=i)
+
+    facilities['Reported'] = facilities['Match'] != ''
+    facilities[['Footfall_Total', 'Entry_Count']] = facilities[['Footfall_Total', 'Entry_Count']].fillna(0)
+    facilities = facilities[
+        ['District_Name', 'Facility_Name', 'AAM_Type', 'Reported', 'Match', 'Reported_Name', 'Score', 'Footfall_Total', 'Entry_Count']
+    ]
+    unmatched = left[['District_Name', 'Reported_Name', 'Footfall_Total', 'Entry_Count']].rename(
+        columns={'Reported_Name': 'Facility_Name'}
+    ).reset_index(drop=True)
+    return facilities, unmatched
+
+
+def district_lists(facilities):
+    # Per district: counts plus the reported and unreported facility names
+    def names(values):
+        return '; '.join(sorted(str(value) for value in values.dropna().unique()))
+
+    flags = facilities.assign(Fuzzy=facilities['Match'] == 'fuzzy')
+    lists = flags.groupby('District_Name', dropna=False).agg(
+        Registered_Facilities=('Facility_Name', 'size'),
+        Reported_Facilities=('Reported', 'sum'),
+        Fuzzy_Matches=('Fuzzy', 'sum'),
+    )
+    lists['Unreported_Facilities'] = lists['Registered_Facilities'] - lists['Reported_Facilities']
+    for column, reported in [('Reported', True), ('Unreported', False)]:
+        subset = flags[flags['Reported'] == reported]
+        lists[column] = subset.groupby('District_Name', dropna=False)['Facility_Name'].agg(names)
+    lists[['Reported', 'Unreported']] = lists[['Reported', 'Unreported']].fillna('')
+    lists = lists.reset_index()[
+        ['District_Name', 'Registered_Facilities', 'Reported_Facilities', 'Unreported_Facilities', 'Fuzzy_Matches', 'Reported', 'Unreported']
+    ]
+    lists.insert(0, 'S.No.', range(1, len(lists) + 1))
+    return lists
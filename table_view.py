@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+import ingest
+from memo import LRUMemo
+
+# Server-side paging for the summary tables. The full table stays here and each rerun sends
+# the browser one page of it. Per table, the searchable name columns are indexed once as
+# lower-cased categories (a search tests each distinct name once, then maps the hits to
+# rows through the integer codes) and each column's sort order is computed the first time
+# it is asked for, so paging, searching and re-sorting never touch the frame itself.
+SEARCH_COLUMNS = ['District_Name', 'Facility_Name']
+PAGE_SIZES = [25, 50, 100, 250]
+MAX_VIEWS = 16
+
+_views = LRUMemo(MAX_VIEWS)
+
+
+class TableView:
+    def __init__(self, df, footer_rows=1):
+        # Trailing footer rows (the summaries' Total row) are pinned below every page
+        body_rows = len(df) - footer_rows
+        self.body = df.iloc[:body_rows].reset_index(drop=True)
+        self.footer = df.iloc[body_rows:]
+        self.columns = [str(col) for col in df.columns]
+        self.index = {
+            col: ingest.to_category(self.body[col], lambda value: str(value).lower())
+            for col in SEARCH_COLUMNS if col in self.body.columns
+        }
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.body)
+
+    def _order(self, column, descending):
+        key = (column, descending)
+        if key not in self._orders:
+            values = self.body[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype(object)
+            try:
+                ordered = values.sort_values(ascending=not descending, kind='stable', na_position='last')
+            except TypeError:
+                # Mixed types sort as text
+                ordered = values.astype(str).sort_values(ascending=not descending, kind='stable')
+            self._orders[key] = ordered.index.to_numpy()
+        return self._orders[key]
+
+    def select(self, query='', sort_by=None, descending=False):
+        # Row positions matching the search, in display order
+        positions = self._order(sort_by, descending) if sort_by else np.arange(len(self.body))
+        query = query.strip().lower()
+        if query and self.index:
+            match = np.zeros(len(self.body), dtype=bool)
+            for values in self.index.values():
+                hits = values.categories.str.contains(query, regex=False)
+                codes = values.codes
+                match |= (codes >= 0) & hits[np.maximum(codes, 0)]
+            positions = positions[match[positions]]
+        return positions
+
+    def page(self, positions, page, page_size):
+        # One page of the selected rows with the footer appended, gaps shown as 0. Name columns
+        # can be categorical with blank (NaN) entries, so they fill through fillna_zero.
+        start = (page - 1) * page_size
+        rows = self.body.iloc[positions[start:start + page_size]]
+        rows = pd.concat([rows, self.footer], ignore_index=True) if len(self.footer) else rows
+        return ingest.fillna_zero(rows)
+
+
+def page_count(rows, page_size):
+    return max(-(-rows // page_size), 1)
+
+
+def get_view(key, df, footer_rows=1):
+    return _views.get(key, TableView, df, footer_rows)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+import daily_cube
+
+COLUMNS = daily_cube.FACILITY_KEYS + ['Entry_Date'] + daily_cube.MEASURES
+
+
+def footfall(rows):
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    for col in daily_cube.FACILITY_KEYS:
+        df[col] = df[col].astype('category')
+    df['Entry_Date'] = pd.to_datetime(df['Entry_Date'])
+    return df
+
+
+ROWS = [
+    ('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+    ('D1', 'A', 'AAM-UPHC', '2024-01-03', 8, 2, 2),
+    ('D1', 'B', 'AAM-UPHC', '1900-01-02', 3, 1, 1),
+    ('D1', 'B', 'AAM-UPHC', None, 7, 2, 1),
+    ('D1', 'B', 'AAM-UPHC', '2024-01-03', 1, 1, 1),
+]
+
+
+def totals(df):
+    # (facility, total, female, entries) per facility, sorted by facility
+    df = df.sort_values('Facility_Name')
+    return list(zip(df['Facility_Name'].astype(object), *[df[m].tolist() for m in daily_cube.MEASURES]))
+
+
+def test_stray_date_adds_one_day_column():
+    cube = daily_cube.DailyCube(footfall(ROWS))
+
+    assert cube.days.strftime('%Y-%m-%d').tolist() == ['1900-01-02', '2024-01-01', '2024-01-03']
+    assert cube.first_day == pd.Timestamp('1900-01-02')
+    assert cube.last_day == pd.Timestamp('2024-01-03')
+    for measure in daily_cube.MEASURES:
+        assert cube.prefix[measure].shape == (2, 4)
+        assert cube.prefix[measure].dtype == np.int32
+
+
+def test_measure_dtypes():
+    rows = [
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 2_000_000_000, 5.0, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-02', 2_000_000_000, None, 1),
+        ('D1', 'B', 'AAM-UPHC', '2024-01-01', 1.5, 1.0, 1),
+    ]
+    cube = daily_cube.DailyCube(footfall(rows))
+
+    # Fractional footfall stays float; blank cells are whole numbers once filled with 0; a
+    # facility total past the int32 range keeps the measure in int64
+    assert cube.prefix['Footfall_Total'].dtype == np.float64
+    assert cube.prefix['Footfall_Female'].dtype == np.int32
+    assert cube.prefix['Entry_Count'].dtype == np.int32
+    rows[2] = ('D1', 'B', 'AAM-UPHC', '2024-01-01', 1, 1.0, 1)
+    cube = daily_cube.DailyCube(footfall(rows))
+    assert cube.prefix['Footfall_Total'].dtype == np.int64
+    assert totals(cube.range_totals()) == [('A', 4_000_000_000, 5, 2), ('B', 1, 1, 1)]
+
+
+def test_range_totals():
+    cube = daily_cube.DailyCube(footfall(ROWS))
+
+    # Without a range undated entries count too
+    assert totals(cube.range_totals()) == [('A', 18, 7, 3), ('B', 11, 4, 3)]
+    assert totals(cube.range_totals('2024-01-01', '2024-01-02')) == [('A', 10, 5, 1)]
+    assert totals(cube.range_totals('2024-01-02', '2024-12-31')) == [('A', 8, 2, 2), ('B', 1, 1, 1)]
+    assert totals(cube.range_totals('1899-01-01', '2023-12-31')) == [('B', 3, 1, 1)]
+    assert totals(cube.range_totals('2025-01-01', '2025-12-31')) == []
+
+
+def test_period_totals():
+    cube = daily_cube.DailyCube(footfall(ROWS))
+    edges = pd.to_datetime(['2023-12-01', '2024-01-02', '2024-02-01'])
+    periods = cube.period_totals(edges).sort_values(['Period', 'Facility_Name'])
+
+    assert list(zip(periods['Facility_Name'].astype(object), periods['Period'], periods['Footfall_Total'])) == [
+        ('A', 0, 10), ('A', 1, 8), ('B', 1, 1)
+    ]
+
+
+def test_reporting_bitmap_follows_cube_days():
+    bitmap = daily_cube.DailyCube(footfall(ROWS)).reporting_bitmap()
+    stats = bitmap.facility_stats('2024-01-01', '2024-01-31').sort_values('Facility_Name')
+
+    assert stats['Days_Reported'].tolist() == [2, 1]
+    assert stats['Days_Missed'].tolist() == [0, 1]
+    daily = bitmap.district_daily()
+    assert daily.index.strftime('%Y-%m-%d').tolist() == ['1900-01-02', '2024-01-01', '2024-01-03']
+    assert daily['D1'].tolist() == [1, 1, 2]
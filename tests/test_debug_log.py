@@ -0,0 +1,45 @@
+import json
+import logging
+import multiprocessing
+import queue
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import debug_log
+
+
+def test_queued_exception_keeps_event_and_traceback_apart():
+    records = queue.SimpleQueue()
+    handler = debug_log.EventQueueHandler(records)
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        record = logging.getLogger('test').makeRecord(
+            'test', logging.ERROR, __file__, 0, "report_failed", None, sys.exc_info(),
+            extra={'fields': {'rows': 3}}
+        )
+    handler.emit(record)
+    queued = records.get_nowait()
+
+    assert queued.exc_info is None
+    entry = json.loads(debug_log.JsonLinesFormatter().format(queued))
+    assert entry['event'] == "report_failed"
+    assert entry['rows'] == 3
+    assert entry['exc'].startswith("Traceback")
+    assert entry['exc'].endswith("ZeroDivisionError: division by zero")
+
+
+def test_spawned_worker_logs_through_the_parent():
+    context = multiprocessing.get_context('spawn')
+    records = context.Queue()
+    with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                             initializer=debug_log.init_worker, initargs=(records,)) as pool:
+        # The worker imported debug_log but has no listener writing to the log file
+        assert pool.submit(getattr, debug_log.logger, '_queue_listener', None).result() is None
+        pool.submit(debug_log.log_event, "worker_parsed", rows=3).result()
+        record = records.get(timeout=30)
+
+    entry = json.loads(debug_log.JsonLinesFormatter().format(record))
+    assert entry['event'] == "worker_parsed"
+    assert entry['rows'] == 3
+
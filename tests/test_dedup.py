@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import dedup
+import table_view
+
+COLUMNS = dedup.FACILITY_KEYS + ['Entry_Date', 'Footfall_Total', 'Footfall_Female', 'Entry_Count']
+
+
+def footfall(rows):
+    # Normalized footfall frame as ingest produces it: categorical keys, parsed dates
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    for col in dedup.FACILITY_KEYS:
+        df[col] = df[col].astype('category')
+    df['Entry_Date'] = pd.to_datetime(df['Entry_Date'])
+    return df
+
+
+def kept(result):
+    # (facility, day, total, female, entries) of every kept row, in row order
+    days = result['Entry_Date'].dt.strftime('%Y-%m-%d').fillna('')
+    return list(zip(
+        result['Facility_Name'].astype(object), days,
+        result['Footfall_Total'].tolist(), result['Footfall_Female'].tolist(), result['Entry_Count'].tolist()
+    ))
+
+
+def test_flag_keeps_every_row_and_reports_exact_and_near():
+    df = footfall([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+        ('D1', 'B', 'AAM-UPHC', '2024-01-01', 8, 4, 1),
+        ('D1', 'B', 'AAM-UPHC', '2024-01-01', 9, 4, 1),
+        ('D1', 'C', 'AAM-UPHC', '2024-01-01', 3, 1, 1),
+    ])
+    result, report = dedup.deduplicate(df, 'flag')
+
+    assert result is df
+    assert report['Facility_Name'].astype(object).tolist() == ['A', 'B']
+    assert report['Duplicate_Kind'].tolist() == ['exact', 'near']
+    assert report['Entries'].tolist() == [2, 2]
+    assert report['Distinct_Submissions'].tolist() == [1, 2]
+    assert report['Min_Footfall_Total'].tolist() == [10, 8]
+    assert report['Max_Footfall_Total'].tolist() == [10, 9]
+    assert report['Entries_Removed'].tolist() == [0, 0]
+
+
+def test_exact_collapses_identical_entries_only():
+    df = footfall([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 12, 6, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-02', 10, 5, 1),
+    ])
+    result, report = dedup.deduplicate(df, 'exact')
+
+    assert kept(result) == [
+        ('A', '2024-01-01', 10, 5, 1),
+        ('A', '2024-01-01', 12, 6, 1),
+        ('A', '2024-01-02', 10, 5, 1),
+    ]
+    assert report['Entries_Removed'].tolist() == [1]
+    assert report['Duplicate_Kind'].tolist() == ['near']
+
+
+@pytest.mark.parametrize('policy, expected', [
+    ('latest', [('A', '2024-01-01', 9, 3, 1)]),
+    ('max', [('A', '2024-01-01', 12, 6, 1)]),
+])
+def test_latest_and_max_keep_one_entry_per_facility_day(policy, expected):
+    df = footfall([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 12, 6, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 9, 3, 1),
+    ])
+    result, report = dedup.deduplicate(df, policy)
+
+    assert kept(result) == expected
+    assert report['Entries_Removed'].tolist() == [2]
+
+
+def test_max_tie_keeps_the_later_entry():
+    df = footfall([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 12, 5, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 7, 2, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 12, 6, 1),
+    ])
+    result, _ = dedup.deduplicate(df, 'max')
+
+    assert kept(result) == [('A', '2024-01-01', 12, 6, 1)]
+
+
+@pytest.mark.parametrize('policy', ['exact', 'latest', 'max'])
+def test_undated_entries_only_collapse_as_exact_duplicates(policy):
+    df = footfall([
+        ('D1', 'A', 'AAM-UPHC', None, 4, 1, 1),
+        ('D1', 'A', 'AAM-UPHC', None, 5, 1, 1),
+        ('D1', 'A', 'AAM-UPHC', None, 4, 1, 1),
+    ])
+    result, report = dedup.deduplicate(df, policy)
+
+    assert kept(result) == [('A', '', 4, 1, 1), ('A', '', 5, 1, 1)]
+    # The two differing entries have no day in common, so only the exact pair is reported
+    assert len(report) == 1
+    assert report['Entry_Date'].isna().all()
+    assert report['Duplicate_Kind'].tolist() == ['exact']
+    assert report['Entries_Removed'].tolist() == [1]
+
+
+def test_aggregated_rows_count_their_entries():
+    # Streamed CSVs fold identical entries into one row with Entry_Count > 1
+    df = footfall([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 30, 12, 3),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 11, 4, 1),
+        ('D1', 'B', 'AAM-UPHC', '2024-01-01', 14, 6, 2),
+    ])
+    _, flagged = dedup.deduplicate(df, 'flag')
+    assert flagged['Entries'].tolist() == [4, 2]
+    assert flagged['Distinct_Submissions'].tolist() == [2, 1]
+    assert flagged['Min_Footfall_Total'].tolist() == [10, 7]
+    assert flagged['Max_Footfall_Total'].tolist() == [11, 7]
+
+    result, report = dedup.deduplicate(df, 'exact')
+    assert kept(result) == [
+        ('A', '2024-01-01', 10, 4, 1),
+        ('A', '2024-01-01', 11, 4, 1),
+        ('B', '2024-01-01', 7, 3, 1),
+    ]
+    assert report['Entries_Removed'].tolist() == [2, 1]
+
+    result, report = dedup.deduplicate(df, 'max')
+    assert kept(result) == [('A', '2024-01-01', 11, 4, 1), ('B', '2024-01-01', 7, 3, 1)]
+    assert report['Entries_Removed'].tolist() == [3, 1]
+
+    result, _ = dedup.deduplicate(df, 'latest')
+    assert kept(result) == [('A', '2024-01-01', 11, 4, 1), ('B', '2024-01-01', 7, 3, 1)]
+
+
+def test_report_with_blank_names_pages():
+    df = footfall([
+        (np.nan, 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+        (np.nan, 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+    ])
+    _, report = dedup.deduplicate(df, 'flag')
+    view = table_view.TableView(report, footer_rows=0)
+    page = view.page(view.select(), 1, table_view.PAGE_SIZES[0])
+
+    assert page['District_Name'].tolist() == [0]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        dedup.deduplicate(footfall([]), 'newest')
@@ -0,0 +1,43 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+import district_packs
+import pipeline
+
+
+def facility_summary():
+    rows = pd.DataFrame({
+        'District_Name': ['A B', 'A_B', 'a b', 'a b', 'C'],
+        'Facility_Name': ['F1', 'F2', 'F3', 'F4', 'F5'],
+        'AAM_Type': ['AAM-UPHC'] * 5,
+        'Footfall_Total': [10, 20, 30, 40, 50],
+        'Footfall_Female': [5, 10, 15, 20, 25],
+    })
+    return pipeline.facility_summary_for(rows)
+
+
+def test_unique_folder():
+    used = set()
+    assert [district_packs.unique_folder(d, used) for d in ['A B', 'A_B', 'a b', 'A_B_2', '??', None]] == [
+        'A_B', 'A_B_2', 'a_b_3', 'A_B_2_2', 'Unknown_District', 'None'
+    ]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_every_district_gets_its_own_folder(workers, monkeypatch):
+    monkeypatch.setattr(district_packs, 'PACK_WORKERS', workers)
+    if workers > 1:
+        monkeypatch.setattr(district_packs, '_pool', district_packs.worker_pool.SpawnPool(workers))
+    artifact = district_packs.build_zip(facility_summary())
+    try:
+        with artifact.open() as f, zipfile.ZipFile(f) as archive:
+            folders = sorted({name.split('/')[0] for name in archive.namelist()})
+            sheet = pd.read_excel(archive.open(f"A_B_2/{pipeline.REPORT_FILES['facility-xlsx']}"))
+    finally:
+        artifact.remove()
+
+    assert folders == ['A_B', 'A_B_2', 'C', 'a_b_3']
+    assert len(archive.namelist()) == 8
+    assert sheet['Facility_Name'].tolist()[0] == 'F2'
@@ -0,0 +1,82 @@
+import pandas as pd
+
+import history_store
+
+COLUMNS = history_store.KEY_COLS + ['Entry_Date'] + history_store.VALUE_COLS
+
+
+def footfall(rows):
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df['Entry_Date'] = pd.to_datetime(df['Entry_Date'])
+    return df
+
+
+def test_upserts_days_and_reports_bounds(tmp_path):
+    history = history_store.FootfallHistory(str(tmp_path / 'history.sqlite3'))
+    assert history.day_bounds() == (None, None)
+    assert not history.has_footfall()
+
+    first = footfall([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-02', 6, 3, 1),
+    ])
+    assert history.append_footfall('upload-1', first) == 2
+    # The latest upload again is skipped; a later upload only rewrites the days that changed
+    assert history.append_footfall('upload-1', first) == 0
+    second = footfall([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-02', 6, 3, 1),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-03', 9, 4, 2),
+    ])
+    assert history.append_footfall('upload-2', second) == 1
+
+    assert history.has_footfall()
+    assert history.day_bounds() == (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-03'))
+    totals = history.range_totals('2024-01-02', '2024-01-03')
+    assert totals[['Footfall_Total', 'Footfall_Female', 'Entry_Count']].iloc[0].tolist() == [15, 7, 3]
+
+
+def test_reopened_store_keeps_its_data(tmp_path):
+    path = str(tmp_path / 'history.sqlite3')
+    history_store.FootfallHistory(path).append_footfall(
+        'upload-1', footfall([('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1)])
+    )
+    history = history_store.FootfallHistory(path)
+
+    assert history.revision() == 1
+    assert history.range_totals()['Footfall_Total'].tolist() == [10]
+
+
+def test_numeric_keys_are_stored_as_text(tmp_path):
+    history = history_store.FootfallHistory(str(tmp_path / 'history.sqlite3'))
+    df = footfall([
+        (5, 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1),
+        (5, 101, 'AAM-UPHC', '2024-01-01', 4, 2, 1),
+        (7, 'B', 'AAM-UPHC', '2024-01-02', 3, 1, 1),
+    ])
+    df['District_Name'] = df['District_Name'].astype('category')
+
+    assert history.append_footfall('upload-1', df) == 3
+    totals = history.range_totals().sort_values('Facility_Name', key=lambda names: names.astype(str))
+    assert totals['District_Name'].astype(object).tolist() == ['5', '5', '7']
+    assert totals['Facility_Name'].astype(object).tolist() == ['101', 'A', 'B']
+    assert totals['Footfall_Total'].tolist() == [4, 10, 3]
+
+
+def test_database_is_created_on_first_use(tmp_path, monkeypatch):
+    path = tmp_path / 'history.sqlite3'
+    monkeypatch.setattr(history_store, 'HISTORY_DB', str(path))
+    monkeypatch.setattr(history_store, '_history', None)
+    history = history_store.get_history()
+
+    # Checking for saved data (as the app does on every rerun) leaves no file behind
+    assert not history.has_footfall() and not history.has_master()
+    assert not path.exists()
+    history.append_footfall('upload-1', footfall([('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5, 1)]))
+    assert path.exists()
+    assert history_store.get_history() is history and history.has_footfall()
+
+    # Deleting the file starts over with a fresh schema
+    path.unlink()
+    assert not history.has_footfall()
+    assert history.day_bounds() == (None, None)
+
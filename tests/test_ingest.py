@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+import ingest
+import parse_cache
+
+COLUMNS = ingest.AGGREGATE_KEYS + ingest.FOOTFALL_VALUE_COLS
+
+
+def frame(rows, categories=True):
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df['Entry_Date'] = pd.to_datetime(df['Entry_Date'], format='ISO8601')
+    df['Entry_Count'] = np.ones(len(df), dtype=np.int8)
+    if categories:
+        for col in ['District_Name', 'Facility_Name', 'AAM_Type']:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def csv(rows):
+    df = pd.DataFrame(rows, columns=['District', 'Facility Name', 'AAM Type', 'Entry Date',
+                                     'Footfall Total', 'Footfall_Female'])
+    return df.to_csv(index=False).encode()
+
+
+def test_concat_footfall_unions_categories():
+    first = frame([('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5)])
+    second = frame([('D2', 'B', 'AAM-USHC', '2024-01-02', 4, 2)])
+    # Numeric district codes in one file and names in the other cannot share one category dtype
+    third = frame([(7, 'C', 'AAM-UPHC', '2024-01-03', 3, 1)])
+    third['District_Name'] = third['District_Name'].astype('category')
+
+    df = ingest.concat_footfall([first, second])
+    assert isinstance(df['Facility_Name'].dtype, pd.CategoricalDtype)
+    assert df['Facility_Name'].tolist() == ['A', 'B']
+    assert df['Footfall_Total'].tolist() == [10, 4]
+
+    df = ingest.concat_footfall([first, second, third])
+    assert isinstance(df['District_Name'].dtype, pd.CategoricalDtype)
+    assert df['District_Name'].astype(object).tolist() == ['D1', 'D2', 7]
+
+
+def test_drop_overlapping_days_keeps_the_higher_priority_file():
+    old = frame([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-01', 10, 5),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-02', 6, 3),
+        ('D1', 'A', 'AAM-UPHC', None, 1, 1),
+    ])
+    new = frame([
+        # Same facility-day at a different time of day still overlaps
+        ('D1', 'A', 'AAM-UPHC', '2024-01-02 09:30', 8, 4),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-03', 9, 4),
+        ('D1', 'A', 'AAM-UPHC', None, 2, 1),
+    ])
+    df = ingest.concat_footfall([old, new])
+    file_index = np.repeat([0, 1], 3)
+
+    kept, dropped = ingest.drop_overlapping_days(df, file_index, np.array([0, 1]))
+    assert dropped == 1
+    # Undated entries cannot overlap, so both files keep theirs
+    assert kept['Footfall_Total'].tolist() == [10, 1, 8, 9, 2]
+
+    kept, dropped = ingest.drop_overlapping_days(df, file_index, np.array([1, 0]))
+    assert dropped == 1
+    assert kept['Footfall_Total'].tolist() == [10, 6, 1, 9, 2]
+
+
+def test_later_export_wins_overlapping_days(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, 'CACHE_DIR', str(tmp_path))
+    january = csv([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-30', 10, 5),
+        ('D1', 'A', 'AAM-UPHC', '2024-01-31', 6, 3),
+    ])
+    february = csv([
+        ('D1', 'A', 'AAM-UPHC', '2024-01-31', 7, 3),
+        ('D1', 'A', 'AAM-UPHC', '2024-02-01', 9, 4),
+    ])
+
+    # The file ending on the later day wins, whichever order the files were uploaded in
+    for files in ([('jan.csv', january), ('feb.csv', february)], [('feb.csv', february), ('jan.csv', january)]):
+        df, missing, _ = ingest.load_footfall_uploads(files)
+        assert missing == []
+        df = df.sort_values('Entry_Date')
+        assert df['Entry_Date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-30', '2024-01-31', '2024-02-01']
+        assert df['Footfall_Total'].tolist() == [10, 7, 9]
+
+    # Files ending on the same day fall back to upload order: the later upload wins
+    df, _, _ = ingest.load_footfall_uploads([('feb.csv', february), ('feb-fixed.csv', february.replace(b',7,', b',8,'))])
+    assert df.loc[df['Entry_Date'] == '2024-01-31', 'Footfall_Total'].tolist() == [8]
@@ -0,0 +1,33 @@
+from memo import LRUMemo
+
+
+def test_builds_once_and_evicts_least_recently_used():
+    built = []
+
+    def build(key):
+        built.append(key)
+        return key.upper()
+
+    memo = LRUMemo(2)
+    assert memo.get('a', build, 'a') == 'A'
+    assert memo.get('b', build, 'b') == 'B'
+    assert memo.get('a', build, 'a') == 'A'
+    # 'b' is now the least recently used, so 'c' pushes it out
+    assert memo.get('c', build, 'c') == 'C'
+    assert len(memo) == 2
+    assert memo.get('a', build, 'a') == 'A'
+    assert memo.get('b', build, 'b') == 'B'
+    assert built == ['a', 'b', 'c', 'b']
+
+
+def test_bounded_by_size_keeps_the_newest_value():
+    memo = LRUMemo(max_bytes=10, weigh=len)
+    memo.get('a', str, 'aaaa')
+    memo.get('b', str, 'bbbb')
+    assert memo.nbytes() == 8
+    memo.get('c', str, 'cccc')
+    assert len(memo) == 2 and memo.nbytes() == 8
+    # A value over the bound on its own replaces everything else but is still kept
+    memo.get('d', str, 'd' * 20)
+    assert len(memo) == 1 and memo.nbytes() == 20
+
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline
+
+KEYS = ['District_Name', 'Facility_Name', 'AAM_Type']
+
+
+def categorical(rows, columns):
+    df = pd.DataFrame(rows, columns=columns)
+    for col in KEYS:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def days(edges):
+    return edges.strftime('%Y-%m-%d').tolist()
+
+
+def test_month_edges():
+    edges, labels = pipeline.period_edges('month', 3, '2024-03-01', '2024-03-15')
+    assert days(edges) == ['2024-01-01', '2024-02-01', '2024-03-01', '2024-03-16']
+    # Only a month the To Date cuts short says where it stops
+    assert labels == ['Jan 2024', 'Feb 2024', 'Mar 2024 (to 15)']
+
+    edges, labels = pipeline.period_edges('month', 2, '2024-02-01', '2024-02-29')
+    assert days(edges) == ['2024-01-01', '2024-02-01', '2024-03-01']
+    assert labels == ['Jan 2024', 'Feb 2024']
+
+
+def test_week_and_range_edges():
+    edges, labels = pipeline.period_edges('week', 2, None, '2024-03-14')
+    assert days(edges) == ['2024-03-01', '2024-03-08', '2024-03-15']
+    assert labels == ['2024-03-01–2024-03-07', '2024-03-08–2024-03-14']
+
+    # Periods as long as the selected range, laid back to back
+    edges, labels = pipeline.period_edges('range', 3, '2024-03-11', '2024-03-14')
+    assert days(edges) == ['2024-03-03', '2024-03-07', '2024-03-11', '2024-03-15']
+    assert labels == ['2024-03-03–2024-03-06', '2024-03-07–2024-03-10', '2024-03-11–2024-03-14']
+
+    edges, labels = pipeline.period_edges('range', 2, '2024-03-14', '2024-03-14')
+    assert labels == ['2024-03-13', '2024-03-14']
+
+    with pytest.raises(ValueError):
+        pipeline.period_edges('quarter', 2, '2024-01-01', '2024-03-31')
+
+
+def test_side_by_side():
+    metrics = {
+        'Footfall': pd.DataFrame({0: [0, 10], 1: [5, 15], 2: [5, 0]}),
+        'Rate': pd.DataFrame({0: [50.0, 20.0], 1: [75.0, 20.0], 2: [0.0, 10.0]}),
+    }
+    df = pipeline._side_by_side(metrics, ['P1', 'P2', 'P3'], rates=['Rate'])
+
+    assert df.columns.tolist() == [
+        'Footfall | P1', 'Rate | P1',
+        'Footfall | P2', 'Rate | P2', 'Δ Footfall | P2', '% Change Footfall | P2', 'Δ Rate | P2',
+        'Footfall | P3', 'Rate | P3', 'Δ Footfall | P3', '% Change Footfall | P3', 'Δ Rate | P3',
+    ]
+    assert df['Δ Footfall | P2'].tolist() == [5, 5]
+    # A change from zero has no percentage
+    assert np.isnan(df['% Change Footfall | P2'].iloc[0])
+    assert df['% Change Footfall | P2'].iloc[1] == 50.0
+    assert df['% Change Footfall | P3'].tolist() == [0.0, -100.0]
+    # Rates only get the change in points
+    assert df['Δ Rate | P3'].tolist() == [-75.0, -10.0]
+
+
+def test_comparisons_by_type():
+    period_totals = categorical([
+        ('D1', 'F1', 'AAM-UPHC', 0, 10, 4, 1),
+        ('D1', 'F1', 'AAM-UPHC', 1, 15, 6, 1),
+        ('D1', 'F2', 'AAM-UPHC', 1, 5, 5, 1),
+        ('D2', 'F3', 'AAM-USHC', 0, 7, 3, 1),
+    ], KEYS + ['Period', 'Footfall_Total', 'Footfall_Female', 'Entry_Count'])
+    master = categorical([
+        ('D1', 'F1', 'AAM-UPHC'), ('D1', 'F2', 'AAM-UPHC'), ('D3', 'F9', 'AAM-UPHC'), ('D2', 'F3', 'AAM-USHC'),
+    ], KEYS)
+
+    comparisons = pipeline.comparisons_by_type(period_totals, master, ['P1', 'P2'])
+    facilities, districts = comparisons['AAM-UPHC']
+
+    assert facilities['S.No.'].tolist() == [1, 2, '']
+    assert facilities['Facility_Name'].tolist() == ['F1', 'F2', '']
+    assert facilities['District_Name'].tolist() == ['D1', 'D1', 'Total']
+    # A facility without entries in a period shows 0 there, and its change from 0 has no percentage
+    assert facilities['Footfall_Total | P1'].tolist() == [10, 0, 10]
+    assert facilities['Footfall_Total | P2'].tolist() == [15, 5, 20]
+    assert facilities['Δ Footfall_Total | P2'].tolist() == [5, 5, 10]
+    assert facilities['% Change Footfall_Total | P2'].iloc[[0, 2]].tolist() == [50.0, 100.0]
+    assert np.isnan(facilities['% Change Footfall_Total | P2'].iloc[1])
+
+    # District rows follow the master, including a district that never reported
+    assert districts['District_Name'].tolist() == ['D1', 'D3', 'Total']
+    assert districts['Registered_Facilities'].tolist() == [2, 1, 3]
+    assert districts['Reported_Facilities | P1'].tolist() == [1, 0, 1]
+    assert districts['Reported_Facilities | P2'].tolist() == [2, 0, 2]
+    assert districts['%_Reported | P2'].tolist() == [100.0, 0.0, 66.67]
+    assert districts['Δ %_Reported | P2'].tolist() == [50.0, 0.0, 33.34]
+    assert 'Total_Footfall | P2' in districts and '% Change %_Reported | P2' not in districts
+
+    facilities, districts = comparisons['AAM-USHC']
+    assert facilities['Footfall_Total | P2'].tolist() == [0, 0]
+    assert facilities['% Change Footfall_Total | P2'].tolist() == [-100.0, -100.0]
+    assert districts['District_Name'].tolist() == ['D2', 'Total']
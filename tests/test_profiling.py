@@ -0,0 +1,31 @@
+import time
+import tracemalloc
+
+import profiling
+
+
+def test_abandoned_run_is_released_by_age(monkeypatch):
+    monkeypatch.setattr(profiling, 'STALE_RUN_SEC', 0.01)
+    abandoned = profiling.start_run()
+    assert tracemalloc.is_tracing()
+    time.sleep(0.02)
+
+    profiling.history()
+    assert not abandoned.active
+    assert not tracemalloc.is_tracing()
+
+    # A later finish of the abandoned run is recorded without releasing it twice
+    profiling.finish_run(abandoned)
+    assert profiling._tracing == 0
+
+
+def test_finished_run_stops_tracing():
+    run = profiling.start_run()
+    with profiling.stage("parse"):
+        with profiling.stage("chunk"):
+            pass
+    record = profiling.finish_run(run, rows=1)
+
+    assert not tracemalloc.is_tracing()
+    assert [s['stage'] for s in record['stages']] == ["parse", "parse > chunk"]
+    assert record['context'] == {'rows': 1}
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+import pipeline
+import reconcile
+
+
+def master(rows):
+    return pd.DataFrame(rows, columns=['District_Name', 'Facility_Name', 'AAM_Type'])
+
+
+def totals(rows):
+    # Per-facility totals as the cube and the history return them: categorical keys
+    df = pd.DataFrame(rows, columns=['District_Name', 'Facility_Name', 'AAM_Type', 'Footfall_Total', 'Entry_Count'])
+    for col in ['District_Name', 'Facility_Name', 'AAM_Type']:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def matches(facilities):
+    return list(zip(facilities['Facility_Name'], facilities['Match'], facilities['Reported_Name'].fillna('')))
+
+
+def test_match_key_ignores_case_punctuation_and_spacing():
+    assert reconcile.match_key(" U.P.H.C.  Ward-12 ") == reconcile.match_key("uphc ward 12") == "UPHC WARD 12"
+    assert pd.isna(reconcile.match_key("..."))
+    assert pd.isna(reconcile.match_key(np.nan))
+
+
+def test_exact_then_fuzzy_within_district():
+    facilities, unmatched = reconcile.reconcile(
+        master([
+            ('D1', 'UPHC Rampur', 'AAM-UPHC'),
+            ('D1', 'UPHC Shivaji Nagar', 'AAM-UPHC'),
+            ('D1', 'UPHC Ward 12', 'AAM-UPHC'),
+            ('D2', 'UPHC Lal Bagh', 'AAM-UPHC'),
+        ]),
+        totals([
+            ('D1', 'u.p.h.c. rampur', 'AAM-UPHC', 10, 1),
+            ('D1', 'UPHC Shivaji Nagr', 'AAM-UPHC', 7, 2),
+            ('D1', 'UPHC Ward 13', 'AAM-UPHC', 3, 1),
+            # Same name in another district is not a match
+            ('D1', 'UPHC Lal Bagh', 'AAM-UPHC', 4, 1),
+        ])
+    )
+
+    assert matches(facilities) == [
+        ('UPHC Rampur', 'exact', 'u.p.h.c. rampur'),
+        ('UPHC Shivaji Nagar', 'fuzzy', 'UPHC Shivaji Nagr'),
+        ('UPHC Ward 12', '', ''),
+        ('UPHC Lal Bagh', '', ''),
+    ]
+    assert facilities['Footfall_Total'].tolist() == [10, 7, 0, 0]
+    assert sorted(unmatched['Facility_Name']) == ['UPHC Lal Bagh', 'UPHC Ward 13']
+
+    lists = reconcile.district_lists(facilities)
+    assert lists['Registered_Facilities'].tolist() == [3, 1]
+    assert lists['Reported_Facilities'].tolist() == [2, 0]
+    assert lists['Fuzzy_Matches'].tolist() == [1, 0]
+    assert lists['Reported'].tolist() == ['UPHC Rampur; UPHC Shivaji Nagar', '']
+
+
+def test_reported_facilities_without_a_district():
+    # Every reporting facility has a blank district, so the grouped District_Name is all NaN
+    facility_totals = totals([
+        (np.nan, 'UPHC Rampur', 'AAM-UPHC', 5, 1),
+        (np.nan, 'UPHC Shivaji Nagr', 'AAM-UPHC', 6, 1),
+    ])
+    master_df = master([
+        ('D1', 'UPHC Rampur', 'AAM-UPHC'),
+        (np.nan, 'UPHC Shivaji Nagar', 'AAM-UPHC'),
+    ])
+    facilities, district_lists, unmatched = pipeline.build_reconciliation(facility_totals, master_df, 'aam-uphc')
+
+    assert matches(facilities) == [('UPHC Rampur', '', ''), ('UPHC Shivaji Nagar', 'fuzzy', 'UPHC Shivaji Nagr')]
+    assert unmatched['Facility_Name'].tolist() == ['UPHC Rampur']
+    assert district_lists['Reported_Facilities'].sum() == 1
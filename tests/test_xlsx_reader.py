@@ -0,0 +1,156 @@
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+import ingest
+import xlsx_reader
+
+# Small workbooks written part by part, so each test controls exactly how the sheet XML
+# spells its cells: shared and inline strings, 1904 dates, dates typed as text, blanks
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>
+</Types>"""
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<workbookPr{date1904}/>
+<sheets><sheet name="Daily_Entry" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>
+</Relationships>"""
+# Style 1 is the built-in short date format, so read_excel returns those cells as dates
+STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="1"><fill><patternFill patternType="none"/></fill></fills>
+<borders count="1"><border/></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="2">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+SHARED_STRINGS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<si><t>Facility Name</t></si>
+<si><t>District</t></si>
+<si><t>Facility A</t></si>
+<si><r><t>Dist</t></r><r><rPr><b/></rPr><t>rict One</t></r></si>
+<si><t>Facility &amp; Co</t><rPh sb="0" eb="1"><t>ignored</t></rPh></si>
+<si><t>12</t></si>
+</sst>"""
+SHEET = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<{p}worksheet xmlns{colon}{p_name}="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<{p}sheetData>{rows}</{p}sheetData>
+</{p}worksheet>"""
+
+# Header: shared, inline, plain-string and numeric-looking cells, plus a column no map knows
+HEADER = (
+    '<c r="A1" t="s"><v>0</v></c>'
+    '<c r="B1" t="inlineStr"><is><t>AAM Type</t></is></c>'
+    '<c r="C1" t="s"><v>1</v></c>'
+    '<c r="D1" t="str"><v>Entry Date</v></c>'
+    '<c r="E1" t="inlineStr"><is><t>Footfall Total</t></is></c>'
+    '<c r="F1" t="str"><v>Footfall_Female</v></c>'
+    '<c r="G1" t="str"><v>Remarks</v></c>'
+)
+ROWS = [
+    # Shared strings, a serial date, plain numbers
+    '<c r="A2" t="s"><v>2</v></c><c r="B2" t="inlineStr"><is><t>AAM-UPHC</t></is></c>'
+    '<c r="C2" t="s"><v>3</v></c><c r="D2" s="1"><v>45292</v></c><c r="E2"><v>10</v></c><c r="F2"><v>4</v></c>'
+    '<c r="G2" t="str"><v>ok</v></c>',
+    # Escaped inline name, a date typed as text, a total stored as a shared string, blank female
+    '<c r="A3" t="inlineStr"><is><t>Clinic &lt;North&gt;</t></is></c><c r="B3" t="str"><v>aam-uphc </v></c>'
+    '<c r="C3" t="s"><v>3</v></c><c r="D3" t="str"><v>2024-01-05</v></c><c r="E3" t="s"><v>5</v></c>',
+    # Missing facility and district, a serial date with a time part, fractional footfall
+    '<c r="B4" t="inlineStr"><is><t>AAM-USHC</t></is></c><c r="D4" s="1"><v>45293.5</v></c>'
+    '<c r="E4"><v>7.5</v></c><c r="F4"><v>0</v></c>',
+    # Empty cells written out, an unparseable date
+    '<c r="A5" t="s"><v>4</v></c><c r="B5" t="inlineStr"><is><t>AAM-UPHC</t></is></c><c r="C5" t="s"><v>1</v></c>'
+    '<c r="D5" t="str"><v>not a date</v></c><c r="E5"/><c r="F5" s="1"/>',
+]
+
+
+def workbook(date1904=False, prefix=''):
+    rows = ''.join(
+        f'<{prefix}row r="{n}">{cells.replace("<c ", f"<{prefix}c ").replace("</c>", f"</{prefix}c>")}</{prefix}row>'
+        for n, cells in enumerate([HEADER] + ROWS, start=1)
+    )
+    if prefix:
+        # Prefixed markup keeps its inline string parts in the same namespace
+        for tag in ('is', 't', 'v'):
+            rows = rows.replace(f'<{tag}>', f'<{prefix}{tag}>').replace(f'</{tag}>', f'</{prefix}{tag}>')
+    sheet = SHEET.format(p=prefix, colon=':' if prefix else '', p_name=prefix.rstrip(':'), rows=rows)
+    out = BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', CONTENT_TYPES)
+        zf.writestr('_rels/.rels', ROOT_RELS)
+        zf.writestr('xl/workbook.xml', WORKBOOK.format(date1904=' date1904="1"' if date1904 else ''))
+        zf.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        zf.writestr('xl/styles.xml', STYLES)
+        zf.writestr('xl/sharedStrings.xml', SHARED_STRINGS)
+        zf.writestr('xl/worksheets/sheet1.xml', sheet)
+    return out.getvalue()
+
+
+def normalized(df):
+    # Required columns in a fixed order, with the categorical keys compared as plain values
+    df = df[ingest.required_footfall_cols + ['Entry_Count']].copy()
+    for col in ingest.required_footfall_cols:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df.reset_index(drop=True)
+
+
+@pytest.mark.parametrize('date1904', [False, True])
+@pytest.mark.parametrize('prefix', ['', 'x:'])
+def test_matches_read_excel(date1904, prefix):
+    data = workbook(date1904, prefix)
+    pruned, missing = ingest.read_normalized('Daily_Entry.xlsx', data, ingest.footfall_column_map,
+                                             ingest.required_footfall_cols, "footfall")
+    assert missing == []
+    full, missing = ingest.normalize_frame(pd.read_excel(BytesIO(data)), ingest.footfall_column_map,
+                                           ingest.required_footfall_cols, "footfall")
+    assert missing == []
+    pd.testing.assert_frame_equal(normalized(pruned), normalized(full), check_dtype=False)
+
+
+def test_reads_typed_columns():
+    sheet = xlsx_reader.SheetReader(workbook(date1904=True))
+    assert sheet.read_header() == {
+        0: 'Facility Name', 1: 'AAM Type', 2: 'District', 3: 'Entry Date',
+        4: 'Footfall Total', 5: 'Footfall_Female', 6: 'Remarks'
+    }
+    df = sheet.read_columns({0: ('Facility_Name', 'text'), 3: ('Entry_Date', 'date'), 4: ('Footfall_Total', 'number')})
+
+    assert df['Facility_Name'].tolist()[:2] == ['Facility A', 'Clinic <North>']
+    assert pd.isna(df['Facility_Name'].iloc[2])
+    assert df['Facility_Name'].iloc[3] == 'Facility & Co'
+    assert df['Entry_Date'].tolist()[:3] == [
+        pd.Timestamp('2028-01-02'), pd.Timestamp('2024-01-05'), pd.Timestamp('2028-01-03 12:00')
+    ]
+    assert pd.isna(df['Entry_Date'].iloc[3])
+    assert df['Footfall_Total'].tolist()[:3] == [10, 12, 7.5]
+    assert pd.isna(df['Footfall_Total'].iloc[3])
+
+
+def test_prefixed_markup_falls_back_to_openpyxl():
+    sheet = xlsx_reader.SheetReader(workbook(prefix='x:'))
+    assert sheet.header is None
+    assert sheet.read_header()[2] == 'District'
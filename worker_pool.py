@@ -0,0 +1,37 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import debug_log
+
+# Process pools for CPU-bound work (.xlsx parsing, district packs, batch reports). Workers are
+# spawned rather than forked because the app process runs threads (the logging listeners, the
+# export builders), and they log through the main process (debug_log.init_worker).
+
+
+def _init_worker(log_queue, initializer, initargs):
+    debug_log.init_worker(log_queue)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def spawn_executor(max_workers, initializer=None, initargs=()):
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker, initargs=(debug_log.worker_queue(), initializer, initargs)
+    )
+
+
+class SpawnPool:
+    # A module's shared pool, started on first use and kept for the life of the process
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = spawn_executor(self.max_workers)
+            return self._executor
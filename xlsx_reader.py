@@ -0,0 +1,224 @@
+import html
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from io import BytesIO
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+import openpyxl
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+# Column-pruned reader for .xlsx uploads. The header row of the first sheet is sniffed on
+# its own; the sheet XML is then scanned in blocks with a pattern anchored on the wanted
+# column letters, so cells of every other column are skipped inside the regex engine and
+# never become Python objects. Values come back typed per column: 'text', 'number'
+# (float64) or 'date' (datetime64, Excel serials converted). Workbooks whose XML does not
+# have the plain <c r="A1"> layout go through openpyxl's read-only mode instead.
+BLOCK_BYTES = 8 * 1024 * 1024
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+DOC_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_ROW = re.compile(r'<row\b[^>]*?(?<!/)>(.*?)</row>', re.S)
+_ANY_CELL = r'[A-Z]+'
+
+
+def _cell_pattern(letters):
+    # Groups: column letters, row number, t= attribute, cell body (empty when self-closing)
+    return re.compile(
+        rf'<c r="({letters})(\d+)"(?:[^>]*?\st="(\w+)")?[^>]*?(?:/>|>(.*?)</c>)', re.S
+    )
+
+
+def _cell_text(cell_type, body):
+    # Raw text of a cell body: the <v> value, or the joined <t> runs of an inline string
+    if not body:
+        return None
+    if body.startswith('<v>') and body.endswith('</v>'):
+        return body[3:-4]
+    if cell_type == 'inlineStr':
+        return ''.join(re.findall(r'<t[^>]*>(.*?)</t>', body, re.S))
+    match = re.search(r'<v[^>]*>(.*?)</v>', body, re.S)
+    return match.group(1) if match else None
+
+
+def _excel_number(value):
+    # Whole numbers come back as int, like pandas' own Excel reader
+    return int(value) if value.is_integer() else value
+
+
+class SheetReader:
+    def __init__(self, data):
+        self.data = data
+        self.zip = zipfile.ZipFile(BytesIO(data))
+        self.sheet_path = self._first_sheet_path()
+        self.date_origin = '1904-01-01' if self._date1904() else '1899-12-30'
+        self._strings = None
+        self.header, self.header_row = self._sniff_header()
+
+    def _first_sheet_path(self):
+        workbook = ET.fromstring(self.zip.read('xl/workbook.xml'))
+        rel_id = workbook.find(f'{MAIN_NS}sheets/{MAIN_NS}sheet').get(f'{DOC_REL_NS}id')
+        rels = ET.fromstring(self.zip.read('xl/_rels/workbook.xml.rels'))
+        target = next(rel.get('Target') for rel in rels.iter(f'{PKG_REL_NS}Relationship') if rel.get('Id') == rel_id)
+        return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+
+    def _date1904(self):
+        workbook = ET.fromstring(self.zip.read('xl/workbook.xml'))
+        props = workbook.find(f'{MAIN_NS}workbookPr')
+        return props is not None and props.get('date1904') in ('1', 'true')
+
+    def _shared_strings(self):
+        # Parsed once and kept, since both the header sniff and the data read need it
+        if self._strings is None:
+            self._strings = self._parse_shared_strings()
+        return self._strings
+
+    def _parse_shared_strings(self):
+        if 'xl/sharedStrings.xml' not in self.zip.namelist():
+            return np.empty(0, dtype=object)
+        strings = []
+        with self.zip.open('xl/sharedStrings.xml') as f:
+            for _, elem in ET.iterparse(f):
+                if elem.tag == f'{MAIN_NS}si':
+                    # Rich text keeps its runs in <r><t>; phonetic hints in <rPh> are not cell text
+                    runs = elem.findall(f'{MAIN_NS}t') or elem.findall(f'{MAIN_NS}r/{MAIN_NS}t')
+                    strings.append(''.join(t.text or '' for t in runs))
+                    elem.clear()
+        return np.array(strings, dtype=object)
+
+    def _blocks(self):
+        # Decompressed sheet XML in pieces that end on a row boundary
+        with self.zip.open(self.sheet_path) as f:
+            tail = b''
+            while True:
+                block = f.read(BLOCK_BYTES)
+                if not block:
+                    break
+                block = tail + block
+                cut = block.rfind(b'</row>')
+                if cut < 0:
+                    tail = block
+                    continue
+                cut += len('</row>')
+                yield block[:cut].decode('utf-8')
+                tail = block[cut:]
+            if tail:
+                yield tail.decode('utf-8')
+
+    def _sniff_header(self):
+        # Returns ({column index: header text}, row number), or (None, None) when the sheet
+        # XML needs the openpyxl fallback
+        for block in self._blocks():
+            row = _ROW.search(block)
+            if row is None:
+                continue
+            cells = _cell_pattern(_ANY_CELL).findall(row.group(1))
+            if not cells:
+                return None, None
+            strings = None
+            header = {}
+            for letters, row_number, cell_type, body in cells:
+                text = _cell_text(cell_type, body)
+                if text is None:
+                    continue
+                if cell_type == 's':
+                    if strings is None:
+                        strings = self._shared_strings()
+                    value = strings[int(text)]
+                elif cell_type in ('str', 'inlineStr', 'd'):
+                    value = html.unescape(text)
+                elif cell_type in ('e', 'b'):
+                    value = text
+                else:
+                    value = str(_excel_number(float(text)))
+                header[column_index_from_string(letters) - 1] = value
+            return header, int(cells[0][1])
+        # No plain <row> anywhere, e.g. prefixed <x:row> markup
+        return None, None
+
+    def read_header(self):
+        if self.header is None:
+            workbook = openpyxl.load_workbook(BytesIO(self.data), read_only=True, data_only=True)
+            first = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+            workbook.close()
+            return {i: str(value) for i, value in enumerate(first) if value is not None}
+        return self.header
+
+    def read_columns(self, columns):
+        # columns maps column index -> (name, kind); returns a frame with those columns only
+        if self.header is None:
+            return self._read_with_openpyxl(columns)
+        letters = {get_column_letter(i + 1): spec for i, spec in columns.items()}
+        pattern = _cell_pattern('|'.join(letters))
+        cells = {letter: ([], [], []) for letter in letters}
+        for block in self._blocks():
+            for letter, row_number, cell_type, body in pattern.findall(block):
+                rows, types, texts = cells[letter]
+                rows.append(row_number)
+                types.append(cell_type)
+                texts.append(_cell_text(cell_type, body))
+
+        strings = self._shared_strings() if any('s' in types for _, types, _ in cells.values()) else None
+        frame = {}
+        for letter, (name, kind) in letters.items():
+            rows, types, texts = cells[letter]
+            rows = np.array(rows, dtype=np.int64)
+            keep = rows > self.header_row
+            frame[name] = self._typed(
+                rows[keep], np.array(types, dtype=object)[keep], np.array(texts, dtype=object)[keep], kind, strings
+            )
+        return pd.DataFrame(frame).reset_index(drop=True)
+
+    def _typed(self, rows, types, texts, kind, strings):
+        values = np.full(len(rows), np.nan, dtype=object)
+        present = pd.notna(texts)
+        numeric = present & np.isin(types, ['', 'n'])
+        shared = present & (types == 's')
+        literal = present & np.isin(types, ['str', 'inlineStr', 'd'])
+        boolean = present & (types == 'b')
+
+        numbers = pd.to_numeric(pd.Series(texts[numeric], dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        if shared.any():
+            values[shared] = strings[texts[shared].astype(np.int64)]
+        if literal.any():
+            values[literal] = [html.unescape(text) if '&' in text else text for text in texts[literal]]
+        values[boolean] = texts[boolean] == '1'
+        text_cells = shared | literal
+
+        if kind == 'number':
+            result = np.full(len(rows), np.nan)
+            result[numeric] = numbers
+            result[text_cells] = pd.to_numeric(pd.Series(values[text_cells], dtype=object), errors='coerce')
+            result[boolean] = values[boolean].astype(np.float64)
+            return pd.Series(result, index=rows)
+        if kind == 'date':
+            result = pd.Series(pd.NaT, index=rows, dtype='datetime64[us]')
+            result[numeric] = pd.to_datetime(numbers, unit='D', origin=self.date_origin, errors='coerce')
+            result[text_cells] = pd.to_datetime(pd.Series(values[text_cells], dtype=object), errors='coerce').to_numpy()
+            return result
+        values[numeric] = [_excel_number(number) for number in numbers]
+        return pd.Series(values, index=rows, dtype=object)
+
+    def _read_with_openpyxl(self, columns):
+        workbook = openpyxl.load_workbook(BytesIO(self.data), read_only=True, data_only=True)
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        next(rows, None)
+        positions = sorted(columns)
+        pick = itemgetter(*positions)
+        width = positions[-1] + 1
+        picked = [pick(row) if len(row) >= width else pick(row + (None,) * (width - len(row))) for row in rows]
+        workbook.close()
+        if len(positions) == 1:
+            picked = [(value,) for value in picked]
+        frame = pd.DataFrame(picked, columns=[columns[i][0] for i in positions])
+        for i in positions:
+            name, kind = columns[i]
+            if kind == 'number':
+                frame[name] = pd.to_numeric(frame[name], errors='coerce').astype(np.float64)
+            elif kind == 'date':
+                frame[name] = pd.to_datetime(frame[name], errors='coerce')
+        return frame.dropna(how='all').reset_index(drop=True)
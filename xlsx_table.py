@@ -0,0 +1,74 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+# Streaming Excel writer for the report workbooks. xlsxwriter runs in constant_memory mode,
+# so each row is flushed to a temporary file as soon as the next one starts; every column is
+# converted once, its width is measured on the converted values with numpy, and each sheet's
+# data is written exactly once.
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+WIDTH_PADDING = 2
+PROGRESS_ROWS = 5000
+
+
+def _prepare_column(column):
+    # Returns (cell values, kind, widest value) with missing values filled like fillna(0)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype(object)
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        values = np.array(column.dt.tz_localize(None).dt.to_pydatetime(), dtype=object)
+        values[column.isna().to_numpy()] = None
+        return values.tolist(), 'datetime', len(DATETIME_FORMAT)
+    if pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+        values = column.fillna(0).to_numpy()
+        kind = 'number'
+    else:
+        values = column.to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = 0
+        kind = 'any'
+    width = int(np.char.str_len(values.astype(str)).max()) if len(values) else 0
+    return values.tolist(), kind, width
+
+
+def _cell_writers(worksheet, kinds, datetime_format):
+    def write_datetime(row, col, value):
+        if value is not None:
+            worksheet.write_datetime(row, col, value, datetime_format)
+
+    by_kind = {'number': worksheet.write_number, 'datetime': write_datetime, 'any': worksheet.write}
+    return [by_kind[kind] for kind in kinds]
+
+
+def write_workbook(sheets, progress=None):
+    # sheets maps sheet name -> DataFrame, written in order with auto-sized columns
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'nan_inf_to_errors': True})
+    datetime_format = workbook.add_format({'num_format': DATETIME_FORMAT})
+    total_rows = sum(len(df) for df in sheets.values()) or 1
+    done = 0
+
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.add_worksheet(sheet_name)
+        headers = [str(col) for col in df.columns]
+        columns, kinds = [], []
+        for i, header in enumerate(headers):
+            values, kind, width = _prepare_column(df.iloc[:, i])
+            columns.append(values)
+            kinds.append(kind)
+            worksheet.set_column(i, i, max(width, len(header)) + WIDTH_PADDING)
+
+        worksheet.write_row(0, 0, headers)
+        writers = _cell_writers(worksheet, kinds, datetime_format)
+        for row, values in enumerate(zip(*columns), start=1):
+            for col, (write, value) in enumerate(zip(writers, values)):
+                write(row, col, value)
+            if progress and row % PROGRESS_ROWS == 0:
+                progress(min((done + row) / total_rows, 0.99))
+        done += len(df)
+
+    workbook.close()
+    if progress:
+        progress(1.0)
+    return output.getvalue()